@@ -0,0 +1,32 @@
+"""Benchmark iterating over large fake files line by line.
+
+Run from the repository's root directory:
+
+    $ PYTHONPATH=src python benchmarks/bench_iterate.py [LINES]
+"""
+
+import sys
+import timeit
+from mock_open import MockOpen
+
+
+def iterate_lines(mock_open, path):
+    """Iterate over all of a fake file's lines."""
+    with mock_open(path, 'r') as handle:
+        for _ in handle:
+            pass
+
+
+def main(lines=100000):
+    # pylint: disable=missing-docstring
+    contents = ''.join('This is line number %d\n' % (i, ) for i in range(lines))
+    for recording in ('all', 'count', 'none'):
+        mock_open = MockOpen(read_data=contents, recording=recording)
+        elapsed = min(timeit.repeat(
+            lambda: iterate_lines(mock_open, '/path/to/file'), number=1, repeat=3))
+        print('recording=%-5s iterated %d lines in %.3fs (%.2fus per line)' % (
+            recording, lines, elapsed, elapsed / lines * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,30 @@
+"""Benchmark the cost of opening many distinct fake paths.
+
+Run from the repository's root directory:
+
+    $ PYTHONPATH=src python benchmarks/bench_open.py [N]
+"""
+
+import sys
+import timeit
+from mock_open import MockOpen
+
+
+def open_distinct_paths(count):
+    """Open `count` distinct paths through a fresh `MockOpen`."""
+    mock_open = MockOpen()
+    for i in range(count):
+        with mock_open('/path/to/file_%d' % (i, ), 'r') as handle:
+            handle.read()
+
+
+def main(count=10000):
+    # pylint: disable=missing-docstring
+    elapsed = min(timeit.repeat(
+        lambda: open_distinct_paths(count), number=1, repeat=3))
+    print('opened %d distinct paths in %.3fs (%.1fus per path)' % (
+        count, elapsed, elapsed / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+"""Benchmark writing to large fake files kept in a BytesIO or a ChunkedStore.
+
+Run from the repository's root directory:
+
+    $ PYTHONPATH=src python benchmarks/bench_stores.py [MEGABYTES] [WRITES]
+"""
+
+import random
+import sys
+import timeit
+from os import SEEK_END
+from mock_open import MockOpen, ChunkedStore
+
+
+def append(mock_open, writes):
+    """Append small records, checking the file's size after each one."""
+    with mock_open('/path/to/file', 'ab') as handle:
+        for _ in range(writes):
+            handle.seek(0, SEEK_END)
+            handle.write(b'x' * 100)
+            mock_open.getsize('/path/to/file')
+
+
+def overwrite(mock_open, writes):
+    """Overwrite small records at random offsets."""
+    size = mock_open.getsize('/path/to/file')
+    offsets = random.Random(0).sample(range(size - 100), writes)
+    with mock_open('/path/to/file', 'r+b') as handle:
+        for offset in offsets:
+            handle.seek(offset)
+            handle.write(b'x' * 100)
+
+
+def restore_after_write(mock_open, writes):
+    """Write a record, then restore the file system (as between tests)."""
+    snapshot = mock_open.snapshot()
+    for _ in range(writes):
+        with mock_open('/path/to/file', 'r+b') as handle:
+            handle.write(b'x' * 100)
+        mock_open.restore(snapshot)
+
+
+def truncate(mock_open, writes):
+    """Truncate the file a bit at a time."""
+    with mock_open('/path/to/file', 'r+b') as handle:
+        for _ in range(writes):
+            handle.seek(-100, SEEK_END)
+            handle.truncate()
+
+
+def main(megabytes=16, writes=200):
+    # pylint: disable=missing-docstring
+    contents = b'y' * (megabytes * 1024 * 1024)
+    for scenario in (append, overwrite, restore_after_write, truncate):
+        for store in (None, ChunkedStore):
+            def run():
+                # pylint: disable=missing-docstring,cell-var-from-loop
+                mock_open = MockOpen(recording='none', store=store)
+                mock_open['/path/to/file'].read_data = contents
+                scenario(mock_open, writes)
+            elapsed = min(timeit.repeat(run, number=1, repeat=3))
+            print('%-19s %-12s %d writes to %dMB in %.3fs (%.1fus per write)' % (
+                scenario.__name__, 'ChunkedStore' if store else 'BytesIO', writes,
+                megabytes, elapsed, elapsed / writes * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -1,7 +1,6 @@
 """Setuptools setup script for the package."""
 
 from setuptools import setup, find_packages
-import sys
 
 
 def _get_version():
@@ -14,10 +13,6 @@ def _get_description():
     with open('README.md') as readme:
         return readme.read()
 
-DEPENDENCIES = []
-if sys.version_info < (3, 3):
-    DEPENDENCIES.append('mock')
-
 
 setup(
     name='mock-open',
@@ -32,7 +27,7 @@ setup(
     packages=find_packages('src'),
     package_dir={ '': 'src', },
     test_suite='mock_open.test',
-    install_requires=DEPENDENCIES,
+    python_requires='>=3.8',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Environment :: Console',
@@ -44,8 +39,10 @@ setup(
         'Topic :: Software Development :: Testing',
         'Operating System :: OS Independent',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
     ],
     keywords=' '.join([
         'testing',
@@ -1,3 +1,10 @@
 """A better mock for file I/O."""
 
-from .mocks import MockOpen
+from .mocks import MockOpen, FileHandle
+from .stores import StreamingStore, MappedStore, ChunkedStore
+from .costs import CostModel, VirtualClock
+from .stats import FileStats
+from .tracing import AccessTrace
+from .patchers import patch_os, patch_pathlib, patch_fds
+from .processes import init_worker, merged, Task
+from .async_mocks import AsyncMockOpen, AsyncFileHandle
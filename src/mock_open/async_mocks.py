@@ -0,0 +1,125 @@
+"""Mock classes for asynchronous file I/O (aiofiles-style)."""
+
+import asyncio
+from .mocks import MockOpen
+
+
+class AsyncMockOpen(object):
+    """An asynchronous counterpart of `MockOpen` (to patch `aiofiles.open`, for example).
+
+    Files are opened through a `MockOpen` instance (a new one by default), so
+    both share the same files, contents and recorded calls:
+
+        mock_open = MockOpen()
+        async_open = AsyncMockOpen(mock_open)
+        async with async_open('/path/to/file', 'w') as handle:
+            await handle.write('Some text')
+        assert 'Some text' == mock_open['/path/to/file'].read_data
+
+    Every awaitable operation first yields control to the event loop `yields`
+    times and then sleeps for `latency` seconds, using `sleep` (defaults to
+    `asyncio.sleep`, replace it to avoid actually waiting).
+    """
+    def __init__(self, mock_open=None, latency=0, yields=0, sleep=None):
+        self.mock_open = mock_open if mock_open is not None else MockOpen()
+        self.latency = latency
+        self.yields = yields
+        self.sleep = sleep if sleep is not None else asyncio.sleep
+
+    def __call__(self, path, mode=None, *args, **kws):
+        return _AsyncOpenContext(self, path, mode, args, kws)
+
+    def __getitem__(self, path):
+        return self.mock_open[path]
+
+    def __setitem__(self, path, value):
+        self.mock_open[path] = value
+
+    async def _pause(self):
+        """Simulate waiting for an I/O operation to complete."""
+        for _ in range(self.yields):
+            await asyncio.sleep(0)
+        if self.latency:
+            await self.sleep(self.latency)
+
+    async def _open(self, path, mode, args, kws):
+        """Open a file through the underlying `MockOpen`."""
+        await self._pause()
+        if mode is not None:
+            handle = self.mock_open(path, mode, *args, **kws)
+        else:
+            handle = self.mock_open(path, *args, **kws)
+        return AsyncFileHandle(handle, self)
+
+
+class _AsyncOpenContext(object):
+    """The result of calling `AsyncMockOpen`.
+
+    Like `aiofiles.open`, it may either be awaited or used as an asynchronous
+    context manager.
+    """
+    def __init__(self, async_open, path, mode, args, kws):
+        # pylint: disable=protected-access
+        self.__open = lambda: async_open._open(path, mode, args, kws)
+        self.__handle = None
+
+    def __await__(self):
+        return self.__open().__await__()
+
+    async def __aenter__(self):
+        self.__handle = await self.__open()
+        return self.__handle
+
+    async def __aexit__(self, exception_type, exception, traceback):
+        await self.__handle.close()
+
+
+def _awaitable(name):
+    """Create an `AsyncFileHandle` method awaiting before a synchronous call."""
+    async def method(self, *args, **kws):
+        # pylint: disable=missing-docstring,protected-access
+        await self._async_open._pause()
+        return getattr(self.handle, name)(*args, **kws)
+    method.__name__ = name
+    return method
+
+
+class AsyncFileHandle(object):
+    """An asynchronous file object wrapping a file returned from `MockOpen`.
+
+    Calls are forwarded to (and recorded by) the synchronous file mock, which
+    is accessible as the `handle` attribute.
+    """
+    def __init__(self, handle, async_open):
+        self.handle = handle
+        self._async_open = async_open
+
+    read = _awaitable('read')
+    readline = _awaitable('readline')
+    readlines = _awaitable('readlines')
+    write = _awaitable('write')
+    writelines = _awaitable('writelines')
+    seek = _awaitable('seek')
+    tell = _awaitable('tell')
+    flush = _awaitable('flush')
+    close = _awaitable('close')
+
+    def __getattr__(self, name):
+        if name == 'handle':
+            raise AttributeError(name)
+        return getattr(self.handle, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception, traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        line = await self.readline()
+        if not line:
+            raise StopAsyncIteration()
+        return line
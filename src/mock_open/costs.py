@@ -0,0 +1,63 @@
+"""Simulated costs of file I/O, measured in virtual time."""
+
+from threading import Lock
+
+
+class VirtualClock(object):
+    """A clock which only advances when told to.
+
+    Calling the clock returns the current time, so it may replace
+    `time.monotonic` or `time.time` in the code under test.
+    """
+    def __init__(self, start=0.0):
+        self.now = start
+        self.__lock = Lock()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """Move the clock forward."""
+        with self.__lock:
+            self.now += seconds
+
+
+class CostModel(object):
+    """The simulated cost of I/O operations on fake files.
+
+    Every call to a file's data methods (read, write, seek, etc.) costs
+    `latency` seconds, plus the time to transfer its data at
+    `bytes_per_second` (unlimited when `None`). Opening a file costs
+    `open_cost` seconds. Textual data is measured by its utf8 encoding.
+
+    Costs advance `clock` (a new `VirtualClock` by default) rather than
+    actually sleeping. Any object with an `advance(seconds)` method may be
+    used, including one which does sleep. The total cost charged so far is
+    accumulated in `io_time`.
+    """
+    def __init__(self, latency=0, bytes_per_second=None, open_cost=0, clock=None):
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.open_cost = open_cost
+        self.clock = clock if clock is not None else VirtualClock()
+        self.io_time = 0
+        self.__lock = Lock()
+
+    def cost(self, size=0):
+        """The cost of a call transferring `size` bytes."""
+        if self.bytes_per_second is None or not size:
+            return self.latency
+        return self.latency + float(size) / self.bytes_per_second
+
+    def charge(self, seconds):
+        """Spend time on I/O, returning the time spent."""
+        if seconds:
+            with self.__lock:
+                self.io_time += seconds
+            self.clock.advance(seconds)
+        return seconds
+
+    def reset(self):
+        """Forget the time charged so far (the clock isn't turned back)."""
+        with self.__lock:
+            self.io_time = 0
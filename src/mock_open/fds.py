@@ -0,0 +1,163 @@
+"""Emulating low-level file descriptors over a `MockOpen`'s files."""
+
+import errno
+import os
+from os import SEEK_SET
+from threading import Lock
+
+# The real functions, for descriptors the table doesn't know (captured before
+# anything is patched).
+_REAL = dict(
+    (name, getattr(os, name)) for name in [
+        'read', 'write', 'pread', 'pwrite', 'lseek', 'close', 'fdopen',
+    ] if hasattr(os, name))
+
+# Descriptors are allocated from here on, well above what real files get.
+FIRST_DESCRIPTOR = 1 << 20
+
+
+def _error(code, *args):
+    # pylint: disable=missing-docstring
+    return OSError(code, os.strerror(code), *args)
+
+
+def _mode(flags):
+    """The open() mode matching os.open() flags (except for O_TRUNC)."""
+    access = flags & (os.O_RDONLY | os.O_WRONLY | os.O_RDWR)
+    if flags & os.O_APPEND:
+        return 'a+b' if access == os.O_RDWR else 'ab'
+    if access == os.O_WRONLY:
+        return 'wb'
+    if access == os.O_RDWR:
+        return 'r+b'
+    return 'rb'
+
+
+class _Descriptor(object):
+    """An open descriptor: its file handle, (binary) mode and access flags."""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, handle, flags):
+        access = flags & (os.O_RDONLY | os.O_WRONLY | os.O_RDWR)
+        self.handle = handle
+        self.mode = _mode(flags)
+        self.readable = access != os.O_WRONLY
+        self.writable = access != os.O_RDONLY
+
+
+class FileDescriptorTable(object):
+    """Fake file descriptors for a `MockOpen`'s files.
+
+    Implements `os.open`, `os.read`, `os.write`, `os.pread`, `os.pwrite`,
+    `os.lseek`, `os.close` and `os.fdopen` (see `patchers.patch_fds`). Each
+    descriptor is an independent `mocks.FileHandle` in binary mode, so calls
+    are recorded by the files' mocks like those made through open(): opening
+    a descriptor records a call to the `MockOpen`, reading records a `read`
+    call, etc.
+
+    Descriptors are numbered from `first_descriptor` on, so they don't clash
+    with real ones. Functions given any other descriptor call the real ones.
+    """
+    def __init__(self, mock_open, first_descriptor=FIRST_DESCRIPTOR):
+        self.mock_open = mock_open
+        self.__descriptors = {}
+        self.__next_descriptor = first_descriptor
+        self.__lock = Lock()
+
+    def __contains__(self, descriptor):
+        return descriptor in self.__descriptors
+
+    def open(self, path, flags, mode=0o777, *args, **kws):
+        """Open a file, like `os.open` (`mode` and other arguments are ignored)."""
+        # pylint: disable=unused-argument,protected-access
+        exists = self.mock_open.isfile(path)
+        if exists and flags & os.O_CREAT and flags & os.O_EXCL:
+            raise _error(errno.EEXIST, path)
+        if not exists and not flags & os.O_CREAT:
+            raise _error(errno.ENOENT, path)
+
+        handle = self.mock_open._open(path, _mode(flags), (), {}, True)
+        descriptor = _Descriptor(handle, flags)
+        if flags & os.O_TRUNC and descriptor.writable:
+            handle.file._truncate(0)
+
+        with self.__lock:
+            number = self.__next_descriptor
+            self.__next_descriptor += 1
+            self.__descriptors[number] = descriptor
+        handle.fileno = lambda: number
+        return number
+
+    def read(self, descriptor, size):
+        """Read up to `size` bytes, like `os.read`."""
+        if descriptor not in self.__descriptors:
+            return _REAL['read'](descriptor, size)
+        # pylint: disable=protected-access
+        handle = self.__get(descriptor, readable=True)
+        return handle._forward('read', (size, ), {}, self.__descriptors[descriptor].mode)
+
+    def write(self, descriptor, data):
+        """Write bytes, like `os.write`."""
+        if descriptor not in self.__descriptors:
+            return _REAL['write'](descriptor, data)
+        # pylint: disable=protected-access
+        handle = self.__get(descriptor, writable=True)
+        # Handles opened for appending write at the end of the file.
+        return handle._forward(
+            'write', (bytes(data), ), {}, self.__descriptors[descriptor].mode)
+
+    def pread(self, descriptor, size, offset):
+        """Read up to `size` bytes at an offset, like `os.pread`."""
+        # pylint: disable=protected-access
+        if descriptor not in self.__descriptors:
+            return _REAL['pread'](descriptor, size, offset)
+        handle = self.__get(descriptor, readable=True)
+        return handle._forward_at(
+            offset, 'read', (size, ), {}, self.__descriptors[descriptor].mode)
+
+    def pwrite(self, descriptor, data, offset):
+        """Write bytes at an offset, like `os.pwrite`."""
+        # pylint: disable=protected-access
+        if descriptor not in self.__descriptors:
+            return _REAL['pwrite'](descriptor, data, offset)
+        handle = self.__get(descriptor, writable=True)
+        return handle._forward_at(
+            offset, 'write', (bytes(data), ), {}, self.__descriptors[descriptor].mode)
+
+    def lseek(self, descriptor, position, how=SEEK_SET):
+        """Move a descriptor's position, like `os.lseek`."""
+        if descriptor not in self.__descriptors:
+            return _REAL['lseek'](descriptor, position, how)
+        return self.__get(descriptor).seek(position, how)
+
+    def close(self, descriptor):
+        """Close a descriptor, like `os.close`."""
+        with self.__lock:
+            entry = self.__descriptors.pop(descriptor, None)
+        if entry is None:
+            return _REAL['close'](descriptor)
+        if entry.handle.closed:
+            raise _error(errno.EBADF)
+        entry.handle.close()
+        return None
+
+    def fdopen(self, descriptor, mode='r', *args, **kws):
+        """A file object for a descriptor, like `os.fdopen`.
+
+        The file object is the descriptor's handle, switched to the requested
+        (binary or text) mode, sharing its position. The descriptor's own
+        functions (`read`, `write`, etc.) keep using bytes. Closing the file
+        object closes the descriptor.
+        """
+        if descriptor not in self.__descriptors:
+            return _REAL['fdopen'](descriptor, mode, *args, **kws)
+        handle = self.__get(descriptor)
+        handle.mode = mode
+        return handle
+
+    def __get(self, descriptor, readable=False, writable=False):
+        """Get an open descriptor's handle, checking its access mode."""
+        entry = self.__descriptors[descriptor]
+        if entry.handle.closed or (readable and not entry.readable) or \
+                (writable and not entry.writable):
+            raise _error(errno.EBADF)
+        return entry.handle
@@ -0,0 +1,150 @@
+"""An index of the directories containing fake files."""
+
+import os
+from fnmatch import fnmatchcase
+
+
+def _has_magic(pattern):
+    # pylint: disable=missing-docstring
+    return any(character in pattern for character in '*?[')
+
+
+class DirectoryIndex(object):
+    """Maps directories to the names of their entries.
+
+    Directories exist implicitly as long as they contain a file (directly or
+    in a subdirectory). Adding a path costs a dictionary update per directory
+    not already in the index, and queries only touch the entries they return
+    (or, for glob patterns, the entries of the directories they match).
+
+    Paths are split with `os.path` by default, pass `posixpath` (or `ntpath`)
+    as `pathmodule` to index paths of another flavor.
+    """
+    def __init__(self, pathmodule=os.path):
+        self.__path = pathmodule
+        self.__entries = {}
+
+    def add(self, path):
+        """Add a file's path and its parent directories."""
+        (parent, name) = self.__path.split(path)
+        while name:
+            entries = self.__entries.get(parent)
+            if entries is None:
+                entries = self.__entries[parent] = set()
+            elif name in entries:
+                return
+            entries.add(name)
+            (parent, name) = self.__path.split(parent)
+
+    def remove(self, path):
+        """Remove a path, and any directories left empty."""
+        (parent, name) = self.__path.split(path)
+        while name:
+            entries = self.__entries.get(parent)
+            if entries is None or name not in entries:
+                return
+            if self.__path.join(parent, name) in self.__entries:
+                # Still a directory containing other files.
+                return
+            entries.discard(name)
+            if entries:
+                return
+            del self.__entries[parent]
+            (parent, name) = self.__path.split(parent)
+
+    def clear(self):
+        """Remove all paths."""
+        self.__entries.clear()
+
+    def isdir(self, path):
+        """Whether a directory contains any files."""
+        return path in self.__entries
+
+    def listdir(self, path):
+        """The names of a directory's entries (files and subdirectories).
+
+        Returns `None` if the directory doesn't exist.
+        """
+        entries = self.__entries.get(path)
+        return sorted(entries) if entries is not None else None
+
+    def walk(self, top):
+        """Like `os.walk`, yielding (directory, subdirectories, files) tuples.
+
+        Subdirectories may be pruned by removing them from the yielded list.
+        """
+        entries = self.__entries.get(top)
+        if entries is None:
+            return
+
+        directories = []
+        files = []
+        for name in sorted(entries):
+            if self.__path.join(top, name) in self.__entries:
+                directories.append(name)
+            else:
+                files.append(name)
+        yield (top, directories, files)
+
+        for name in directories:
+            for result in self.walk(self.__path.join(top, name)):
+                yield result
+
+    def glob(self, pattern):
+        """Paths (of files or directories) matching an absolute glob pattern.
+
+        Like `glob.glob`, each component is matched with `fnmatch` (case
+        sensitively) and names starting with a dot are only matched
+        explicitly. A '**' component matches any number of directories.
+        """
+        (root, components) = self.__split_all(pattern)
+        if not components:
+            return [root] if root in self.__entries else []
+        return sorted(self.__glob(root, components))
+
+    def __glob(self, directory, components):
+        """Generate the paths under a directory matching the components."""
+        (component, rest) = (components[0], components[1:])
+        entries = self.__entries.get(directory, ())
+        if component == '**':
+            # Match the rest of the pattern here and in every subdirectory,
+            # or (as the last component) every entry under the directory.
+            if rest:
+                for path in self.__glob(directory, rest):
+                    yield path
+            for name in entries:
+                if name.startswith('.'):
+                    continue
+                path = self.__path.join(directory, name)
+                if not rest:
+                    yield path
+                if path in self.__entries:
+                    for match in self.__glob(path, components):
+                        yield match
+            return
+
+        if _has_magic(component):
+            names = [
+                name for name in entries if fnmatchcase(name, component) and
+                (not name.startswith('.') or component.startswith('.'))
+            ]
+        else:
+            names = [component] if component in entries else []
+
+        for name in names:
+            path = self.__path.join(directory, name)
+            if not rest:
+                yield path
+            elif path in self.__entries:
+                for match in self.__glob(path, rest):
+                    yield match
+
+    def __split_all(self, path):
+        """Split a path into its root and its components."""
+        components = []
+        (head, tail) = self.__path.split(path)
+        while tail:
+            components.append(tail)
+            (head, tail) = self.__path.split(head)
+        return (head, components[::-1])
+
@@ -0,0 +1,140 @@
+"""Journaling changes to a `MockOpen`'s files, to restore earlier states."""
+
+
+class Snapshot(object):
+    """A point in a `Journal` which may be restored (see `MockOpen.snapshot`)."""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, journal, depth, token):
+        self.journal = journal
+        self.depth = depth
+        self.token = token
+
+
+class _Epoch(object):
+    """The changes made since a snapshot was taken (until the next one).
+
+    Only the first change to each path (or file's contents) is saved, as
+    that's the state it had when the snapshot was taken. The byte ranges
+    changed in each file are kept too, for diffs.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, token):
+        self.token = token
+        self.marker = object()
+        self.entries = {}
+        self.contents = {}
+        self.ranges = {}
+
+
+class Journal(object):
+    """A stack of epochs, one per snapshot taken.
+
+    Taking a snapshot only pushes an empty epoch. Changes are saved into the
+    topmost epoch, so restoring a snapshot only touches what was changed
+    since it was taken.
+    """
+    def __init__(self):
+        self.__epochs = []
+
+    @property
+    def epoch(self):
+        """A marker identifying the current epoch (`None` if there are no snapshots).
+
+        It changes whenever the current epoch's changes are reverted, so
+        whoever saves state into it may compare it with the marker of the
+        last epoch they saved into.
+        """
+        return self.__epochs[-1].marker if self.__epochs else None
+
+    def clear(self):
+        """Forget all of the snapshots (and the changes saved for them)."""
+        del self.__epochs[:]
+
+    def snapshot(self):
+        """Start a new epoch, returning a `Snapshot` of the current state."""
+        epoch = _Epoch(object())
+        self.__epochs.append(epoch)
+        return Snapshot(self, len(self.__epochs), epoch.token)
+
+    def save_entry(self, key, entry):
+        """Save a registry entry's state before it first changes in the current epoch."""
+        if self.__epochs:
+            self.__epochs[-1].entries.setdefault(key, entry)
+
+    def save_contents(self, owner, state):
+        """Save a file's contents before they first change in the current epoch."""
+        if self.__epochs:
+            self.__epochs[-1].contents.setdefault(id(owner), (owner, state))
+
+    def mark(self, owner, start, end):
+        """Record that a file's contents changed between two offsets."""
+        if not self.__epochs:
+            return
+        ranges = self.__epochs[-1].ranges.get(id(owner))
+        if ranges is None:
+            self.__epochs[-1].ranges[id(owner)] = (owner, [[start, end]])
+        elif ranges[1][-1][1] == start:
+            # Sequential writes extend the last range.
+            ranges[1][-1][1] = end
+        else:
+            ranges[1].append([start, end])
+
+    def changes(self, snapshot):
+        """The changes made since a snapshot, without reverting them.
+
+        Returns the (entries, contents, ranges) dictionaries saved since the
+        snapshot: the saved registry entries by key, and (owner, state) and
+        (owner, list of [start, end] ranges) pairs by owner id.
+        """
+        self.__check(snapshot)
+        entries = {}
+        contents = {}
+        ranges = {}
+        for epoch in self.__epochs[snapshot.depth - 1:]:
+            for (key, entry) in epoch.entries.items():
+                entries.setdefault(key, entry)
+            for (key, content) in epoch.contents.items():
+                contents.setdefault(key, content)
+            for (key, (owner, changed)) in epoch.ranges.items():
+                ranges.setdefault(key, (owner, []))[1].extend(changed)
+        return (entries, contents, ranges)
+
+    def rollback(self, snapshot):
+        """Pop the changes made since a snapshot, which remains valid.
+
+        Returns the saved (entries, contents) dictionaries to apply in order
+        to restore the snapshot's state. Snapshots taken after it become
+        invalid.
+        """
+        self.__check(snapshot)
+        entries = {}
+        contents = {}
+        # Older epochs hold older states, so they take precedence.
+        while snapshot.depth <= len(self.__epochs):
+            epoch = self.__epochs.pop()
+            entries.update(epoch.entries)
+            contents.update(epoch.contents)
+        self.__epochs.append(_Epoch(snapshot.token))
+        return (entries, list(contents.values()))
+
+    def release(self, snapshot):
+        """Forget a snapshot (and any taken after it), keeping the changes."""
+        self.__check(snapshot)
+        released = self.__epochs[snapshot.depth - 1:]
+        del self.__epochs[snapshot.depth - 1:]
+        if not self.__epochs:
+            return
+        epoch = self.__epochs[-1]
+        for other in released:
+            for (key, entry) in other.entries.items():
+                epoch.entries.setdefault(key, entry)
+            for (key, content) in other.contents.items():
+                epoch.contents.setdefault(key, content)
+            for (key, (owner, changed)) in other.ranges.items():
+                epoch.ranges.setdefault(key, (owner, []))[1].extend(changed)
+
+    def __check(self, snapshot):
+        """Raise a `ValueError` if a snapshot isn't valid anymore."""
+        if snapshot.journal is not self or len(self.__epochs) < snapshot.depth or \
+                self.__epochs[snapshot.depth - 1].token is not snapshot.token:
+            raise ValueError('Invalid snapshot (released or restored past)')
@@ -1,36 +1,406 @@
 """Mock classes for open() and the file type."""
 
+import errno
+import os
+import stat
 import sys
+import tarfile
+import traceback
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
+from threading import RLock
 from os import SEEK_SET, SEEK_END
-from io import TextIOWrapper
-
-try:
-    # pylint: disable=no-name-in-module
-    from unittest.mock import Mock, NonCallableMock, DEFAULT
-except ImportError:
-    from mock import Mock, NonCallableMock, DEFAULT
-
-if sys.version_info < (3, 0):
-    try:
-        from cStringIO import StringIO, StringIO as BytesIO
-    except ImportError:
-        from StringIO import StringIO, StringIO as BytesIO
-else:
-    from io import StringIO, BytesIO
-
-
-class FileLikeMock(NonCallableMock):
-    """Acts like a file object returned from open()."""
-    def __init__(self, name=None, read_data='', *args, **kws):
+# Import this directly so patching the `os` module in tests doesn't affect
+# sizing real files.
+from os import stat as os_stat
+from io import BytesIO, IOBase, TextIOWrapper, open as _io_open
+
+from unittest.mock import Mock, NonCallableMock, DEFAULT, _Call
+
+from .stores import StreamingStore, MappedStore
+from .stats import FileStats
+from .tracing import AccessTrace
+from .index import DirectoryIndex
+from .journal import Journal
+from .pool import ContentPool
+from .processes import ExportedFiles, WriteBack
+
+# File methods whose child mocks wrap the underlying contents object.
+_WRAPPED_METHODS = frozenset([
+    'tell', 'seek', 'read', 'readline', 'readlines', 'write', 'writelines', 'truncate',
+])
+
+# Wrapped file methods which modify the contents.
+_MODIFYING_METHODS = frozenset(['write', 'writelines', ])
+
+# The kinds of calls wrapped file methods are accounted as (see `FileStats`).
+_METHOD_KINDS = {
+    'read': 'read', 'readline': 'read', 'readlines': 'read',
+    'write': 'write', 'writelines': 'write',
+    'seek': 'seek',
+}
+
+# How calls to the wrapped file methods are recorded:
+#  * 'all': Record every call, like any other mock.
+#  * 'first': Record only the first `recording_limit` calls.
+#  * 'last': Record only the last `recording_limit` calls.
+#  * 'count': Only keep `called`, `call_count` and `call_args`.
+#  * 'none': Don't record calls at all.
+RECORDING_POLICIES = ('all', 'first', 'last', 'count', 'none')
+
+
+# A handle which was left open, with the stack of the open() call creating it
+# (or `None` if it wasn't captured).
+Leak = namedtuple('Leak', 'path handle stack')
+
+# A file changed since a snapshot (see `MockOpen.diff`).
+Change = namedtuple('Change', 'path kind ranges old_size new_size')
+
+
+def _size(child):
+    """A file mock's size in bytes (`None` for other mocks)."""
+    # pylint: disable=protected-access
+    return child._size() if isinstance(child, FileLikeMock) else None
+
+
+def _content_change(key, new_size, changed, saved):
+    """The `Change` of a file modified in place, or `None` if it didn't change.
+
+    `new_size` is the file's current size, `changed` are the [start, end]
+    ranges written since the snapshot and `saved` the contents before then.
+    """
+    old_size = saved.size() if saved is not None else None
+    ranges = []
+    for (start, end) in sorted((start, min(end, new_size)) for (start, end) in changed):
+        if end <= start:
+            continue
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    if not ranges and old_size == new_size:
+        return None
+    return Change(
+        key, 'modified', [(start, end - start) for (start, end) in ranges], old_size,
+        new_size)
+
+
+def _check_recording_policy(recording, recording_limit):
+    """Raise a `ValueError` if the recording policy is invalid."""
+    if recording not in RECORDING_POLICIES:
+        raise ValueError('Unknown recording policy %r' % (recording, ))
+    if recording in ('first', 'last') and recording_limit is None:
+        raise ValueError('Recording policy %r requires a limit' % (recording, ))
+
+
+def _check_default_read_data(read_data):
+    """Raise a `ValueError` if `read_data` can't be the contents of many files.
+
+    Each file gets the same `read_data`, so one-shot iterators (generators,
+    for example) would be drained by the first file reading them.
+    """
+    if isinstance(read_data, (str, bytes, bytearray, memoryview)) or callable(read_data):
+        return
+    if iter(read_data) is read_data:
+        raise ValueError(
+            'The default read_data can\'t be a one-shot iterator, '
+            'pass an iterable or a callable instead')
+
+
+def _identity(value):
+    # pylint: disable=missing-docstring
+    return value
+
+
+def _call_side_effect(effect, args, kws):
+    """Apply a mock's side effect the way calling the mock would.
+
+    Returns `DEFAULT` if there's no side effect.
+    """
+    if effect is None:
+        return DEFAULT
+    if _is_exception(effect):
+        raise effect
+    if not callable(effect):
+        result = next(effect)
+        if _is_exception(result):
+            raise result
+        return result
+    return effect(*args, **kws)
+
+
+def _is_exception(obj):
+    # pylint: disable=missing-docstring
+    return isinstance(obj, BaseException) or \
+        (isinstance(obj, type) and issubclass(obj, BaseException))
+
+
+def _data_size(data):
+    """The size of some data in bytes (text is stored encoded as utf8)."""
+    if isinstance(data, str) and not data.isascii():
+        return len(data.encode('utf8'))
+    return len(data)
+
+
+def _transferred(name, args, result):
+    """The number of bytes a wrapped file method call read or wrote."""
+    if name in ('read', 'readline'):
+        return _data_size(result)
+    if name == 'readlines':
+        return sum(_data_size(line) for line in result)
+    if name == 'write':
+        return _data_size(args[0])
+    if name == 'writelines':
+        return sum(_data_size(line) for line in args[0])
+    return 0
+
+
+def _read_real_file(path):
+    """Read a real file's contents, even while `open` is patched."""
+    with _io_open(path, 'rb') as real_file:
+        return real_file.read()
+
+
+class _RealFile(object):
+    """Load a real file's contents (see `MockOpen.from_directory`).
+
+    Its size can be looked up without loading it.
+    """
+    def __init__(self, path, mapped):
+        self.path = path
+        self.mapped = mapped
+
+    def __call__(self):
+        if self.mapped:
+            return MappedStore(self.path)
+        return _read_real_file(self.path)
+
+    def size(self):
+        """The real file's size in bytes."""
+        return os_stat(self.path).st_size
+
+
+def _extract_tar_member(tar, member):
+    """Read a file's contents from a tar archive."""
+    return tar.extractfile(member).read()
+
+
+class _CachedSpecMixin(object):
+    """Cache the attributes a mock derives from its spec.
+
+    Mock introspects its spec with `dir()` every time one is created (some
+    versions do so even when there's no spec at all). The result depends only
+    on the spec, so we compute it once per process and copy it into every new
+    mock afterwards.
+    """
+    _spec_cache = {}
+
+    def _mock_add_spec(self, spec, *args, **kws):
+        # pylint: disable=missing-docstring
+        if spec is not None and not isinstance(spec, type):
+            return super(_CachedSpecMixin, self)._mock_add_spec(spec, *args, **kws)
+
+        key = (spec, args, tuple(sorted(kws.items())))
+        cached = self._spec_cache.get(key)
+        if cached is None:
+            previous = dict(self.__dict__)
+            super(_CachedSpecMixin, self)._mock_add_spec(spec, *args, **kws)
+            cached = dict(
+                (name, value) for (name, value) in self.__dict__.items()
+                if name not in previous or previous[name] is not value)
+            self._spec_cache[key] = cached
+            return None
+
+        for (name, value) in cached.items():
+            self.__dict__[name] = list(value) if isinstance(value, list) else value
+        return None
+
+
+class _FileContents(object):
+    """The contents of a fake file.
+
+    The contents are kept as bytes, either in memory or in one of the stores
+    from the `stores` module (streaming them from an iterable, memory-mapping
+    a real file, etc.). Opening the file as text wraps them with a
+    `TextIOWrapper` which decodes them as they're read instead of converting
+    the whole file each time it's opened in a different mode.
+
+    Accessing the whole contents through `value` returns a snapshot which is
+    cached until the contents are modified, so consecutive accesses don't
+    copy (or decode) the underlying buffer.
+
+    Contents given as text or bytes are kept in a `BytesIO`, or in the store
+    created by calling `store` with their bytes (e.g. `stores.ChunkedStore`).
+    Given a `pool.ContentPool`, their bytes are shared with other files'
+    identical contents until they're modified.
+    """
+    def __init__(self, data, store=None, pool=None):
+        self.is_binary = not isinstance(data, str)
+        self.__shared = None
+        if store is None:
+            store = BytesIO
+        if pool is not None and isinstance(data, (str, bytes)):
+            self.__shared = pool.share(data)
+            self.buffer = store(self.__shared.data)
+        elif not self.is_binary:
+            self.buffer = store(data.encode('utf8'))
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            self.buffer = store(data)
+        elif isinstance(data, IOBase):
+            self.buffer = data
+        else:
+            self.buffer = StreamingStore(data)
+        self.stream = self.buffer
+        self.__text = None
+        self.__snapshots = {}
+        if isinstance(data, (str, bytes)):
+            self.__snapshots[self.is_binary] = data
+        if self.__shared is not None:
+            self.__snapshots[True] = self.__shared.data
+
+        if not self.is_binary:
+            self.set_binary(False)
+
+    @property
+    def value(self):
+        """A snapshot of the whole contents."""
+        return self.snapshot(self.is_binary)
+
+    def snapshot(self, is_binary):
+        """A snapshot of the whole contents, as bytes or as text."""
+        snapshot = self.__snapshots.get(is_binary)
+        if snapshot is None:
+            snapshot = self.__snapshots.get(True)
+            if snapshot is None:
+                snapshot = self.__snapshots[True] = self.buffer.getvalue()
+            if not is_binary:
+                snapshot = self.__snapshots[False] = snapshot.decode('utf8')
+        return snapshot
+
+    def set_binary(self, is_binary):
+        """Switch between accessing the contents as binary or as text."""
+        self.is_binary = is_binary
+        if is_binary:
+            self.stream = self.buffer
+            return
+
+        if self.__text is None:
+            self.__text = TextIOWrapper(
+                self.buffer, encoding='utf8', newline='\n', write_through=True)
+        self.stream = self.__text
+
+    def modified(self):
+        """Invalidate the cached snapshots of the contents (and stop sharing them)."""
+        self.__snapshots.clear()
+        self.__shared = None
+
+    def copy(self):
+        """An independent copy of the contents.
+
+        The copy shares the snapshot's buffer, or the chunks of a store which
+        can copy itself (like `stores.ChunkedStore`).
+        """
+        if hasattr(self.buffer, 'copy'):
+            copy = _FileContents(self.buffer.copy())
+        else:
+            copy = _FileContents(self.snapshot(True))
+        copy.set_binary(self.is_binary)
+        return copy
+
+    def size(self):
+        """The size of the contents in bytes, without copying them."""
+        snapshot = self.__snapshots.get(True)
+        if snapshot is not None:
+            return len(snapshot)
+
+        position = self.buffer.tell()
+        try:
+            return self.buffer.seek(0, SEEK_END)
+        finally:
+            self.buffer.seek(position)
+
+
+class _FileMethodMock(_CachedSpecMixin, Mock):
+    """A child mock for one of a `FileLikeMock`'s methods."""
+
+
+class _DataMethodMock(_FileMethodMock):
+    """A child mock for one of a `FileLikeMock`'s wrapped methods.
+
+    Calls are recorded according to the parent file's recording policy.
+    Unless the policy is 'all', calls aren't propagated to the parent's (and
+    its `MockOpen`'s) `mock_calls` and `method_calls`.
+    """
+    # Mock records calls through `_increment_mock_call` since Python 3.8.
+    def _increment_mock_call(self, *args, **kws):
+        # pylint: disable=missing-docstring
+        recording = self._mock_new_parent.recording
+        if recording == 'all':
+            return super(_DataMethodMock, self)._increment_mock_call(*args, **kws)
+        if recording == 'none':
+            return None
+
+        self.called = True
+        self.call_count += 1
+        self.call_args = _Call((args, kws), two=True)
+        if recording == 'count':
+            return None
+
+        limit = self._mock_new_parent.recording_limit
+        if recording == 'first' and limit <= len(self.call_args_list):
+            return None
+
+        self.call_args_list.append(self.call_args)
+        self.mock_calls.append(_Call(('', args, kws)))
+        if limit < len(self.call_args_list):
+            del self.call_args_list[0]
+            del self.mock_calls[0]
+        return None
+
+
+class FileLikeMock(_CachedSpecMixin, NonCallableMock):
+    """Acts like a file object returned from open().
+
+    `recording` and `recording_limit` control how calls to the file's data
+    methods (read, write, seek, etc.) are recorded, see `RECORDING_POLICIES`.
+
+    When a `cost_model` (see `costs.CostModel`) is set, the data methods and
+    opening the file are charged with simulated time, accumulated in `io_time`.
+
+    The I/O done on the file is counted in `io_stats` (see `stats.FileStats`).
+    Setting `trace` to a `tracing.AccessTrace` also logs every range read or
+    written.
+
+    Contents assigned to `read_data` as text or bytes are kept in a `BytesIO`,
+    unless `store` is set to a callable creating another store from their
+    bytes, like `stores.ChunkedStore` (for large files which are written
+    to). With a `pool` (see `pool.ContentPool`), their bytes are shared with
+    other files having the same contents until the file is written to.
+    """
+    def __init__(self, name=None, read_data='', recording='all', recording_limit=None,
+                 cost_model=None, trace=None, store=None, pool=None, *args, **kws):
+        _check_recording_policy(recording, recording_limit)
         kws.update({'spec': TextIOWrapper, })
         super(FileLikeMock, self).__init__(*args, **kws)
         self.mode = None
+        self.__recording = recording
+        self.__recording_limit = recording_limit
+        self.cost_model = cost_model
+        self.io_time = 0
+        self.io_stats = FileStats()
+        self.trace = trace
+        self.open_stack = None
+        self.store = store
+        self.pool = pool
+        self._journal = None
+        self.__saved_epoch = None
         self.__is_closed = False
         self.read_data = read_data
-        self.close.side_effect = self._close
 
-        self.__enter__ = Mock(side_effect=self._enter)
-        self.__exit__ = Mock(side_effect=self._exit)
+        self.__enter__ = _FileMethodMock(side_effect=self._enter)
+        self.__exit__ = _FileMethodMock(side_effect=self._exit)
 
         if name is not None:
             self.name = name
@@ -40,71 +410,89 @@ class FileLikeMock(NonCallableMock):
         # pylint: disable=missing-docstring
         return self.__is_closed
 
+    @property
+    def recording(self):
+        """The recording policy of the data methods (see `RECORDING_POLICIES`).
+
+        Set `recording_limit` before switching to 'first' or 'last'.
+        """
+        return self.__recording
+
+    @recording.setter
+    def recording(self, recording):
+        # pylint: disable=missing-docstring
+        # pylint: disable=attribute-defined-outside-init
+        _check_recording_policy(recording, self.__recording_limit)
+        self.__recording = recording
+
+    @property
+    def recording_limit(self):
+        """The number of calls kept by the 'first' and 'last' policies."""
+        return self.__recording_limit
+
+    @recording_limit.setter
+    def recording_limit(self, recording_limit):
+        # pylint: disable=missing-docstring
+        # pylint: disable=attribute-defined-outside-init
+        _check_recording_policy(self.__recording, recording_limit)
+        self.__recording_limit = recording_limit
+
     @property
     def read_data(self):
         """Bypass read function to access the contents of the file.
 
         This property should be used for testing purposes.
         """
-        return self.__contents.getvalue()
+        return self.__contents.value
 
     @read_data.setter
     def read_data(self, contents):
         # pylint: disable=missing-docstring
         # pylint: disable=attribute-defined-outside-init
-        if isinstance(contents, str):
-            self.__contents = StringIO()
-        else:
-            self.__contents = BytesIO()
-
-        # Constructing a cStrinIO object with the input string would result
-        # in a read-only object, so we write the contents after construction.
-        self.__contents.write(contents)
-
-        # Set tell/read/write/etc side effects to access the new contents
-        # object.
-        self.tell._mock_wraps = self.__contents.tell
-        self.seek._mock_wraps = self.__contents.seek
-        self.read._mock_wraps = self.__contents.read
-        self.readline._mock_wraps = self.__contents.readline
-        self.readlines._mock_wraps = self.__contents.readlines
-        self.write._mock_wraps = self.__contents.write
-        self.writelines._mock_wraps = self.__contents.writelines
+        self._modifying(replacing=True)
+        self.__contents = _FileContents(contents, self.store, self.pool)
+        journal = self._journaling()
+        if journal is not None:
+            journal.mark(self, 0, self.__contents.size())
+
+    @property
+    def read_buffer(self):
+        """Access the contents of the file without copying them.
+
+        Binary contents are returned as a read-only `memoryview`, textual
+        contents as a `str`. Either is valid until the file is written to.
+        """
+        contents = self.__contents
+        if not contents.is_binary:
+            return contents.value
+
+        view = getattr(contents.buffer, 'view', None)
+        view = view() if view is not None else None
+        return view if view is not None else memoryview(contents.value)
 
     def __iter__(self):
-        return iter(self.__contents)
+        return self
 
     def __next__(self):
-        current_position = self.__contents.tell()
-        self._reset_position(0, SEEK_END)
-        eof = self.__contents.tell()
-        if eof <= current_position:
+        # Only the last line may be missing a newline, so an empty line means
+        # we've reached the end of the file.
+        line = self.readline()
+        if not line:
             raise StopIteration()
-
-        self._reset_position(current_position)
-        return self.readline()
-
-    if sys.version_info < (3, 0):
-        def next(self):
-            return self.__next__()
+        return line
 
     def set_properties(self, path, mode):
         """Set file's properties (name and mode).
 
         This function is also in charge of swapping between textual and
-        binary streams.
+        binary views of the contents.
         """
         if mode is None:
             mode = 'r'
         self.name = path
         self.mode = mode
 
-        if 'b' in self.mode:
-            if not isinstance(self.read_data, bytes):
-                self.read_data = bytes(self.read_data, encoding='utf8')
-        else:
-            if not isinstance(self.read_data, str):
-                self.read_data = str(self.read_data, encoding='utf8')
+        self.__contents.set_binary('b' in self.mode)
 
     def reset_mock(self, visited=None):
         """Reset the default tell/read/write/etc side effects."""
@@ -117,11 +505,170 @@ class FileLikeMock(NonCallableMock):
 
         # Reset contents and tell/read/write/close side effects.
         self.read_data = ''
+        self.io_time = 0
+        self.io_stats.reset()
+        if self.trace is not None:
+            self.trace.clear()
         self.close.side_effect = self._close
 
+    def _get_child_mock(self, **kws):
+        """Create child mocks lazily, wiring file methods as they're accessed.
+
+        tell/read/write/etc wrap `_call_contents` rather than the contents
+        object itself, so replacing the contents doesn't require rewiring the
+        children that were already created.
+        """
+        if self._mock_sealed:
+            return super(FileLikeMock, self)._get_child_mock(**kws)
+
+        name = kws.get('_new_name')
+        if name in _WRAPPED_METHODS:
+            kws['wraps'] = partial(self._call_contents, name)
+            return _DataMethodMock(**kws)
+        if name == 'close':
+            kws['side_effect'] = self._close
+        return _FileMethodMock(**kws)
+
+    def _call_contents(self, name, *args, **kws):
+        """Forward a file method call to the underlying contents object."""
+        if name == 'truncate':
+            return self._truncate(*args, **kws)
+
+        contents = self.__contents
+        journal = None
+        if name in _MODIFYING_METHODS:
+            self._modifying()
+            contents.modified()
+            if name == 'writelines':
+                # Lines may be consumed both by the call and by accounting.
+                args = (list(args[0]), ) + args[1:]
+            journal = self._journaling()
+
+        kind = _METHOD_KINDS.get(name)
+        trace = self.trace
+        if journal is not None or (trace is not None and kind in ('read', 'write')):
+            offset = contents.stream.tell()
+            result = getattr(contents.stream, name)(*args, **kws)
+            end = contents.stream.tell()
+            if trace is not None:
+                trace.record(kind, offset, end - offset)
+            if journal is not None:
+                journal.mark(self, offset, end)
+        else:
+            result = getattr(contents.stream, name)(*args, **kws)
+
+        size = _transferred(name, args, result) if kind != 'seek' else 0
+        if kind is not None:
+            self.io_stats.record(kind, size)
+        cost_model = self.cost_model
+        if cost_model is not None:
+            self.io_time += cost_model.charge(cost_model.cost(size))
+        return result
+
+    def _opened(self, handle):
+        """Account for the file being opened through a handle (or itself)."""
+        self.io_stats.opened(handle)
+        cost_model = self.cost_model
+        if cost_model is not None:
+            self.io_time += cost_model.charge(cost_model.open_cost)
+
+    def _size(self):
+        """The size of the file's contents in bytes."""
+        return self.__contents.size()
+
+    def _read_whole(self, is_binary):
+        """Read the whole file at once, without going through its methods."""
+        data = self.__contents.snapshot(is_binary)
+        self._whole_file_io('read', _data_size(data))
+        return data
+
+    def _write_whole(self, data):
+        """Replace the whole file at once, without going through its methods."""
+        self.read_data = data
+        self._whole_file_io('write', _data_size(data))
+        return len(data)
+
+    def _whole_file_io(self, kind, size):
+        """Account for opening the file, reading or writing it and closing it."""
+        handle = object()
+        self.io_stats.opened(handle)
+        self.io_stats.record(kind, size)
+        self.io_stats.closed(handle)
+        cost_model = self.cost_model
+        if cost_model is not None:
+            self.io_time += cost_model.charge(cost_model.open_cost + cost_model.cost(size))
+
+    def _raw_contents(self):
+        """The whole contents as bytes, and whether they're accessed as binary."""
+        contents = self.__contents
+        return (contents.snapshot(True), contents.is_binary)
+
+    def _write_at(self, offset, data):
+        """Write bytes at an offset, without going through the file's methods."""
+        self._modifying()
+        contents = self.__contents
+        contents.modified()
+        position = contents.stream.tell()
+        contents.buffer.seek(offset)
+        contents.buffer.write(data)
+        contents.stream.seek(position)
+        journal = self._journaling()
+        if journal is not None:
+            journal.mark(self, offset, offset + len(data))
+
+    def _truncate(self, size=None):
+        """Truncate the contents (at the current position by default)."""
+        self._modifying()
+        contents = self.__contents
+        contents.modified()
+        journal = self._journaling()
+        previous_size = contents.size() if journal is not None else None
+        position = contents.stream.tell()
+        size = contents.buffer.truncate(position if size is None else size)
+        contents.stream.seek(position)
+        if journal is not None and size < previous_size:
+            journal.mark(self, size, previous_size)
+        return size
+
+    def _journaling(self):
+        """The journal changes are saved into, or `None` if there are no snapshots."""
+        journal = self._journal
+        return journal if journal is not None and journal.epoch is not None else None
+
+    def _modifying(self, replacing=False):
+        """Save the contents into the journal (if any) before modifying them.
+
+        Contents which are about to be replaced are saved as they are, those
+        about to be modified in place are copied.
+        """
+        journal = self._journaling()
+        if journal is None or self.__saved_epoch is journal.epoch:
+            return
+        self.__saved_epoch = journal.epoch
+        contents = self.__contents
+        journal.save_contents(self, contents if replacing else contents.copy())
+
+    def _restore_contents(self, contents):
+        """Bring back contents saved into the journal."""
+        # pylint: disable=attribute-defined-outside-init
+        self.__contents = contents
+        self.__saved_epoch = None
+
     def _reset_position(self, position=0, whence=SEEK_SET):
         """A shortcut to `_contents`'s `seek` for internal use."""
-        self.__contents.seek(position, whence)
+        return self.__contents.stream.seek(position, whence)
+
+    def _current_position(self):
+        """A shortcut to `_contents`'s `tell` for internal use."""
+        return self.__contents.stream.tell()
+
+    def _switch_view(self, mode, position):
+        """Access the contents according to the mode, from the given position.
+
+        Used by `FileHandle` objects to restore their own view of the file.
+        """
+        self.__contents.set_binary('b' in mode)
+        self.__contents.stream.seek(position)
 
     def _enter(self):
         """Reset the position in buffer according to the mode whenever entering context."""
@@ -139,63 +686,831 @@ class FileLikeMock(NonCallableMock):
     def _close(self):
         """Mark file as closed (used for side_effect)."""
         self.__is_closed = True
+        self.io_stats.closed(self)
         return DEFAULT
 
 
+def _forwarded(name):
+    """Create a `FileHandle` method forwarding calls to its file mock."""
+    def method(self, *args, **kws):
+        # pylint: disable=missing-docstring,protected-access
+        return self._forward(name, args, kws)
+    method.__name__ = name
+    return method
+
+
+class FileHandle(object):
+    """A file object returned from open() when handles are independent.
+
+    Each handle has its own position, mode and closed state, while sharing its
+    path's `FileLikeMock` (and its contents). Calls are forwarded to, and
+    recorded by, that mock, which is accessible as the handle's `file`
+    attribute (or through `MockOpen`'s mapping interface).
+    """
+    def __init__(self, file_mock, path, mode, position, lock):
+        self.file = file_mock
+        self.name = path
+        self.mode = mode
+        self.closed = False
+        self.open_stack = None
+        self.__position = position
+        self.__lock = lock
+
+    read = _forwarded('read')
+    readline = _forwarded('readline')
+    readlines = _forwarded('readlines')
+    write = _forwarded('write')
+    writelines = _forwarded('writelines')
+    seek = _forwarded('seek')
+    tell = _forwarded('tell')
+    truncate = _forwarded('truncate')
+
+    def close(self):
+        """Close the handle (but not other handles to the same file)."""
+        self.closed = True
+        self.file.io_stats.closed(self)
+        return self.file.close()
+
+    def __getattr__(self, name):
+        if name == 'file':
+            raise AttributeError(name)
+        return getattr(self.file, name)
+
+    def __enter__(self):
+        # Entering the file mock resets the shared position, which other
+        # handles may be reading from.
+        with self.__lock:
+            self.file.__enter__()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.closed = True
+        self.file.io_stats.closed(self)
+        return self.file.__exit__(exception_type, exception, traceback)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration()
+        return line
+
+    def _forward_at(self, offset, name, args, kws, mode=None):
+        """Call the file mock's method from an offset, keeping this handle's position.
+
+        The contents are accessed according to `mode` (the handle's own mode
+        by default).
+        """
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+
+        with self.__lock:
+            # pylint: disable=protected-access
+            self.file._switch_view(mode or self.mode, offset)
+            return getattr(self.file, name)(*args, **kws)
+
+    def _forward(self, name, args, kws, mode=None):
+        """Call the file mock's method from this handle's position.
+
+        The contents are accessed according to `mode` (the handle's own mode
+        by default).
+        """
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+
+        mode = mode or self.mode
+        with self.__lock:
+            # pylint: disable=protected-access
+            self.file._switch_view(mode, self.__position)
+            if name in _MODIFYING_METHODS and 'a' in mode:
+                # Appending handles always write at the end of the file.
+                self.file._reset_position(0, SEEK_END)
+            try:
+                return getattr(self.file, name)(*args, **kws)
+            finally:
+                self.__position = self.file._current_position()
+
+
 class MockOpen(Mock):
-    """A mock for the open() builtin function."""
-    def __init__(self, read_data='', *args, **kws):
-        kws.update({'spec': open, 'name': open.__name__, })
+    """A mock for the open() builtin function.
+
+    `recording` and `recording_limit` set the recording policy of the file
+    mocks it creates (see `FileLikeMock`).
+
+    By default, every call to open() with the same path returns the same
+    `FileLikeMock`. With `independent_handles` set, each call returns a new
+    `FileHandle` with its own position, forwarding calls to the path's mock.
+
+    `cost_model` is the default `costs.CostModel` of the file mocks it
+    creates. Setting a file mock's own `cost_model` overrides it for a path.
+    Likewise, `store` is the default `store` of the file mocks it creates
+    (e.g. `stores.ChunkedStore` for large files which are written to).
+    Files created with identical text or bytes (e.g. the default `read_data`)
+    share them until they're written to, see `pool.ContentPool`.
+
+    The I/O done on each path is counted, see `stats()` and `stats_total()`.
+    With `trace` set, each file mock it creates traces its accesses in a new
+    `tracing.AccessTrace`.
+
+    Handles which were opened but not closed are reported by `leaks()`. To
+    tell where they were opened, the stack of every `stack_sampling`-th call
+    to open() is captured in the handle's `open_stack` (0 disables it).
+
+    Files are registered by their canonical paths (see `canonical_path()`),
+    so e.g. 'b', './a/../b' and `pathlib.Path('b')` are the same file, unless
+    `normalize_paths` is unset. With `case_sensitive` unset, paths differing
+    only by case are the same file as well.
+
+    The directories containing the registered files may be queried with
+    `listdir()`, `walk()`, `glob()` and `isdir()`. The registry may also be
+    queried and modified like a file system, with `exists()`, `isfile()`,
+    `getsize()`, `stat()`, `remove()` and `rename()` (see also
+    `patchers.patch_os`).
+    """
+    def __init__(self, read_data='', recording='all', recording_limit=None,
+                 independent_handles=False, cost_model=None, trace=False, stack_sampling=0,
+                 normalize_paths=True, case_sensitive=True, store=None, *args, **kws):
+        _check_recording_policy(recording, recording_limit)
+        _check_default_read_data(read_data)
+        kws.update({'spec': _io_open, 'name': _io_open.__name__, })
         super(MockOpen, self).__init__(*args, **kws)
+        self.__independent_handles = independent_handles
         self.__files = {}
+        self.__lazy_files = {}
+        self.__index = DirectoryIndex()
+        self.__journal = Journal()
+        self.__pool = ContentPool()
+        self.__lock = RLock()
+        self.__path_locks = {}
         self.__read_data = read_data
+        self.__recording = (recording, recording_limit)
+        self.__stats = FileStats()
+        self.__trace = trace
+        self.__stack_sampling = stack_sampling
+        self.__normalize_paths = normalize_paths
+        self.__case_sensitive = case_sensitive
+        self.__open_counter = count()
+        self.__archives = []
+        self.cost_model = cost_model
+        self.store = store
 
-    def __call__(self, path, mode=None, *args, **kws):
-        original_side_effect = self._mock_side_effect
+    @classmethod
+    def from_mapping(cls, mapping, *args, **kws):
+        """Create a mock with files for each of the mapping's paths.
+
+        The mapping's values are the files' contents (anything assignable to
+        `FileLikeMock.read_data`). File mocks are only created once their
+        path is first opened or accessed.
+        """
+        mock_open = cls(*args, **kws)
+        for (path, contents) in mapping.items():
+            mock_open.add_lazy_file(path, partial(_identity, contents))
+        return mock_open
+
+    @classmethod
+    def from_directory(cls, root, mount_point=None, mapped=False, *args, **kws):
+        """Create a mock with files for each of a real directory's files.
+
+        The files are placed under `mount_point` (by default, the same paths
+        as the real files). A real file is only read once its path is first
+        opened or accessed, or is memory-mapped instead when `mapped` is set
+        (see `stores.MappedStore`).
+        """
+        mock_open = cls(*args, **kws)
+        if mount_point is None:
+            mount_point = root
+
+        for (directory, _, filenames) in os.walk(root):
+            for filename in filenames:
+                real_path = os.path.join(directory, filename)
+                path = os.path.join(mount_point, os.path.relpath(real_path, root))
+                mock_open.add_lazy_file(path, _RealFile(real_path, mapped))
+        return mock_open
+
+    @classmethod
+    def from_tar(cls, archive, mount_point=None, *args, **kws):
+        """Create a mock with files for each of a tar archive's files.
 
-        if path in self.__files:
-            self._mock_return_value = self.__files[path]
-            self._mock_side_effect = self._mock_return_value.side_effect
+        `archive` is either a path or a binary file object. Files are named
+        by their paths inside the archive, joined to `mount_point` if given.
+        A file is only extracted once its path is first opened or accessed.
 
+        The archive is kept open for extracting files until `close()` is
+        called (only closing the archive's file if it was given a path).
+        """
+        mock_open = cls(*args, **kws)
+        if hasattr(archive, 'read'):
+            tar = tarfile.open(fileobj=archive)
+        else:
+            tar = tarfile.open(archive)
+        mock_open.__archives.append(tar)
+        for member in tar.getmembers():
+            if not member.isfile():
+                continue
+            path = member.name
+            if mount_point is not None:
+                path = os.path.join(mount_point, path)
+            mock_open.add_lazy_file(path, partial(_extract_tar_member, tar, member))
+        return mock_open
+
+    def add_lazy_file(self, path, load):
+        """Register a file whose contents are only loaded once it's used.
+
+        `load` is called without arguments the first time the path is opened
+        or accessed, returning the file's contents.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            self.__save_entry(key)
+            self.__files.pop(key, None)
+            self.__lazy_files[key] = (path, load)
+            self.__add_to_index(key)
+
+    def close(self):
+        """Close the archives opened by `from_tar()`.
+
+        Files which weren't extracted yet can't be loaded afterwards.
+        """
+        with self.__lock:
+            (archives, self.__archives) = (self.__archives, [])
+        for tar in archives:
+            tar.close()
+
+    def canonical_path(self, path):
+        """The key a path's file is registered by.
+
+        Path-like objects and bytes are converted to strings, which are made
+        absolute (relative to the current directory) and normalized, and
+        lowercased unless case sensitive. Other objects (e.g. integer file
+        descriptors) are used as they are.
+        """
+        if not self.__normalize_paths or isinstance(path, int):
+            return path
         try:
-            if mode is not None:
-                child = super(MockOpen, self).__call__(path, mode, *args, **kws)
+            path = os.fspath(path)
+        except TypeError:
+            return path
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        elif not isinstance(path, str):
+            return path
+
+        path = os.path.abspath(path)
+        if not self.__case_sensitive:
+            path = path.lower()
+        return path
+
+    def __call__(self, path, mode=None, *args, **kws):
+        return self._open(path, mode, args, kws, self.__independent_handles)
+
+    def _open(self, path, mode, args, kws, independent_handles):
+        """Record a call to open() and return the opened file.
+
+        Used by `__call__` and by other interfaces opening files (like the
+        `fds` module), which may ask for an independent handle regardless of
+        the mock's setting.
+        """
+        # Several threads may call open() at once, so we avoid touching the
+        # mock's own side_effect and return_value. The registry lock is only
+        # held while dispatching the call, while file-level setup is done
+        # under the path's own lock. The call is recorded through
+        # `_increment_mock_call`, which Mock has since Python 3.8.
+        args = ((path, ) if mode is None else (path, mode)) + args
+        key = self.canonical_path(path)
+        with self.__lock:
+            self._mock_check_sig(*args, **kws)
+            self._increment_mock_call(*args, **kws)
+
+            if key in self.__lazy_files:
+                self.__load_lazy_file(key, _new_name='()')
+            child = self.__files.get(key)
+
+        # Opening known paths triggers their own side effect rather than the
+        # global one.
+        result = _call_side_effect(
+            self.side_effect if child is None else child.side_effect, args, kws)
+        if result is not DEFAULT:
+            return result
+
+        if child is None:
+            with self.__lock:
+                child = self.__files.get(key)
+                if child is None:
+                    child = self.__claim_child(path, key)
+                    self.__save_entry(key)
+                    self.__files[key] = child
+                    self.__add_to_index(key)
+
+        lock = self.__path_lock(key)
+        with lock:
+            child.set_properties(path, mode)
+
+            # Each call to `open` should reset the position in the file according to the mode.
+            if mode and 'a' in mode:
+                position = child._reset_position(0, SEEK_END)
             else:
-                child = super(MockOpen, self).__call__(path, *args, **kws)
-        finally:
-            # Reset the side effect after each call so that the next call to
-            # open() won't cause the same side_effect.
-            self._mock_side_effect = original_side_effect
-
-        # Consecutive calls to open() set `return_value` to the last file mock
-        # created. If the paths differ (and child isn't a newly-created mock,
-        # evident by its name attribute being unset) we create a new file mock
-        # instead of returning the previous one.
-        if not isinstance(child.name, Mock) and path != child.name:
-            child = self._get_child_mock(_new_name='()', name=path)
-            self.__files[path] = child
+                position = child._reset_position()
+
+        self._mock_return_value = child
+        if not isinstance(child, FileLikeMock):
+            return child
+
+        handle = child
+        if independent_handles:
+            handle = FileHandle(child, path, child.mode, position, lock)
+        handle.open_stack = self.__open_stack()
+        child._opened(handle)
+        return handle
+
+    @property
+    def io_time(self):
+        """The total simulated time charged to all of the files."""
+        with self.__lock:
+            files = list(self.__files.values())
+        return sum(child.io_time for child in files if isinstance(child, FileLikeMock))
+
+    def stats(self, path):
+        """The I/O statistics of a path's file (see `stats.FileStats`).
+
+        Lazy files which weren't loaded yet have empty statistics (and aren't
+        loaded). Raises a `KeyError` if the path isn't a registered file.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            child = self.__files.get(key)
+            if child is not None:
+                return child.io_stats
+            if key in self.__lazy_files:
+                return FileStats()
+        raise KeyError(path)
+
+    def stats_total(self):
+        """The I/O statistics of all of the files together.
+
+        `peak_open` is the most handles open at once, regardless of paths.
+        """
+        return self.__stats
+
+    def isdir(self, path):
+        """Whether a directory contains any of the registered files."""
+        key = self.canonical_path(path)
+        with self.__lock:
+            return self.__index.isdir(key)
+
+    def listdir(self, path='.'):
+        """The names of a directory's files and subdirectories, like `os.listdir`.
+
+        Raises an `OSError` if the directory doesn't contain any files.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            names = self.__index.listdir(key)
+        if names is None:
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return names
+
+    def walk(self, top):
+        """Walk a directory's tree like `os.walk` (top-down), by canonical paths."""
+        key = self.canonical_path(top)
+        with self.__lock:
+            # Don't hold the lock while the caller iterates.
+            tree = list(self.__index.walk(key))
+
+        pruned = set()
+        for (directory, directories, files) in tree:
+            listed = list(directories)
+            if directory not in pruned:
+                yield (directory, directories, files)
+                listed = [name for name in listed if name not in directories]
+            pruned.update(os.path.join(directory, name) for name in listed)
+
+    def read_file(self, path, binary=False):
+        """Read a whole file's contents, like `pathlib.Path.read_bytes`/`read_text`.
+
+        Registered files are read directly from their contents, without
+        recording calls or creating a handle. Unknown paths and files with
+        side effects are opened (and read) as usual.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            if key in self.__lazy_files:
+                self.__load_lazy_file(key)
+            child = self.__files.get(key)
+
+        if not isinstance(child, FileLikeMock) or child.side_effect is not None:
+            with self(path, 'rb' if binary else 'r') as handle:
+                return handle.read()
+        with self.__path_lock(key):
+            return child._read_whole(binary)
+
+    def write_file(self, path, data):
+        """Replace a whole file's contents, like `pathlib.Path.write_bytes`/`write_text`.
+
+        The contents are replaced directly, without recording calls or
+        creating a handle, unless the file has side effects, in which case
+        it's opened (and written) as usual. Returns the length of the data.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            if key in self.__lazy_files:
+                # The contents are about to be replaced, don't load them.
+                self.__save_entry(key)
+                del self.__lazy_files[key]
+            child = self.__files.get(key)
+            if child is None:
+                self.__save_entry(key)
+                child = self.__files[key] = self._get_child_mock(name=path)
+                self.__add_to_index(key)
 
-        child.set_properties(path, mode)
+        if not isinstance(child, FileLikeMock) or child.side_effect is not None:
+            with self(path, 'w' if isinstance(data, str) else 'wb') as handle:
+                return handle.write(data)
+        with self.__path_lock(key):
+            return child._write_whole(data)
 
-        if path not in self.__files:
-            self.__files[path] = child
+    def snapshot(self):
+        """Take a snapshot of the files (and their contents) to restore later.
 
-        # Each call to `open` should reset the position in the file according to the mode.
-        if mode and 'a' in mode:
-            self.__files[path]._reset_position(0, SEEK_END)
+        Taking a snapshot doesn't copy anything. Instead, files are saved as
+        they're first changed afterwards (a file's contents are copied before
+        its first write), so restoring only touches the files which changed.
+        Snapshots form a stack: restoring one keeps it valid (for restoring
+        again, e.g. after each test) but discards any taken after it.
+
+        Recorded calls, statistics and open handles aren't part of snapshots.
+        """
+        with self.__lock:
+            return self.__journal.snapshot()
+
+    def restore(self, snapshot):
+        """Bring the files back to their state when a snapshot was taken."""
+        with self.__lock:
+            (entries, contents) = self.__journal.rollback(snapshot)
+            for (key, entry) in entries.items():
+                self.__files.pop(key, None)
+                self.__lazy_files.pop(key, None)
+                if entry is None:
+                    self.__remove_from_index(key)
+                    continue
+                (registry, value) = entry
+                if registry == 'file':
+                    self.__files[key] = value
+                else:
+                    self.__lazy_files[key] = value
+                self.__add_to_index(key)
+
+            for (child, saved) in contents:
+                child._restore_contents(saved)
+
+    def diff(self, since):
+        """The files changed since a snapshot, as a sorted list of `Change` tuples.
+
+        Each change has the file's canonical `path`, its `kind` ('created',
+        'modified' or 'removed'), the `ranges` of bytes which were written or
+        truncated since (as (offset, length) pairs, within the current size)
+        and the file's `old_size` and `new_size` in bytes (`None` when it
+        didn't exist, or wasn't loaded yet). A file is truncated when its new
+        size is smaller. Created files and files replaced by another one (by
+        assignment, renaming, `write_file` etc) are changed as a whole, and a
+        renamed file is removed from its old path and created at the new one.
+
+        Only the files changed since the snapshot are looked at, using the
+        ranges recorded as they're written.
+        """
+        with self.__lock:
+            (entries, contents, ranges) = self.__journal.changes(since)
+            saved = dict((owner_id, state) for (owner_id, (_, state)) in contents.items())
+            changes = []
+            handled = set()
+            for (key, entry) in entries.items():
+                if key in self.__lazy_files:
+                    current = ('lazy', self.__lazy_files[key])
+                elif key in self.__files:
+                    current = ('file', self.__files[key])
+                else:
+                    current = None
+                if current is not None and entry is not None and \
+                        current[0] == entry[0] and current[1] is entry[1]:
+                    continue
+                if current is None and entry is None:
+                    continue
+
+                old_size = None
+                if entry is not None and entry[0] == 'file':
+                    handled.add(id(entry[1]))
+                    state = saved.get(id(entry[1]))
+                    old_size = state.size() if state is not None else \
+                        self.__size(key, entry[1])
+                if current is None:
+                    changes.append(Change(key, 'removed', [], old_size, None))
+                    continue
+                child = self.__files[key] if current[0] == 'file' else \
+                    self.__load_lazy_file(key)
+                handled.add(id(child))
+                new_size = self.__size(key, child)
+                changes.append(Change(
+                    key, 'created' if entry is None else 'modified',
+                    [(0, new_size)] if new_size else [], old_size, new_size))
+
+            unresolved = []
+            for (owner_id, (owner, changed)) in ranges.items():
+                if owner_id in handled:
+                    continue
+                key = None
+                if not isinstance(owner.name, Mock):
+                    key = self.canonical_path(owner.name)
+                if key is None or self.__files.get(key) is not owner:
+                    unresolved.append((owner, changed))
+                    continue
+                changes.append(_content_change(
+                    key, self.__size(key, owner), changed, saved.get(owner_id)))
+
+            if unresolved:
+                # Files registered under another name than their own (e.g.
+                # assigned mocks), which require looking them up.
+                keys = dict((id(child), key) for (key, child) in self.__files.items())
+                for (owner, changed) in unresolved:
+                    key = keys.get(id(owner))
+                    if key is not None:
+                        changes.append(_content_change(
+                            key, self.__size(key, owner), changed, saved.get(id(owner))))
+
+        return sorted(
+            (change for change in changes if change is not None), key=lambda change: change.path)
+
+    def release(self, snapshot):
+        """Forget a snapshot (and those taken after it), keeping the changes since."""
+        with self.__lock:
+            self.__journal.release(snapshot)
+
+    def export(self, lazy=True):
+        """A picklable copy of the files, to use them from other processes.
+
+        See the `processes` module. Lazy files are exported with their
+        loaders, which must be picklable (those of `from_mapping` and
+        `from_directory` are, those of `from_tar` aren't), unless `lazy` is
+        unset to load them first. Cost models and mocks assigned as files
+        (other than `FileLikeMock`s) aren't exported.
+        """
+        settings = {
+            'read_data': self.__read_data,
+            'recording': self.__recording[0],
+            'recording_limit': self.__recording[1],
+            'independent_handles': self.__independent_handles,
+            'trace': self.__trace,
+            'stack_sampling': self.__stack_sampling,
+            'normalize_paths': self.__normalize_paths,
+            'case_sensitive': self.__case_sensitive,
+            'store': self.store,
+        }
+        with self.__lock:
+            if not lazy:
+                for key in list(self.__lazy_files):
+                    self.__load_lazy_file(key)
+            files = dict(
+                (key, child.read_data) for (key, child) in self.__files.items()
+                if isinstance(child, FileLikeMock))
+            lazy_files = dict(
+                (key, load) for (key, (_, load)) in self.__lazy_files.items())
+        # Mocks are instances of a subclass created for each of them.
+        return ExportedFiles(type(self).__bases__[0], settings, files, lazy_files)
+
+    def write_back(self, since):
+        """The changes since a snapshot, and the I/O done since the last call.
+
+        Returns a picklable `processes.WriteBack` to `merge` into another
+        `MockOpen` (usually in another process). The I/O statistics are
+        reset.
+        """
+        # pylint: disable=protected-access
+        with self.__lock:
+            files = []
+            for change in self.diff(since):
+                if change.kind == 'removed':
+                    files.append((change.path, None, None, None))
+                    continue
+                child = self.__files.get(change.path)
+                if not isinstance(child, FileLikeMock):
+                    continue
+                with self.__path_lock(change.path):
+                    (data, is_binary) = child._raw_contents()
+                writes = [
+                    (offset, data[offset:offset + length])
+                    for (offset, length) in change.ranges
+                ]
+                files.append((change.path, writes, change.new_size, is_binary))
+
+            stats = {}
+            other_stats = self.__stats.counters()
+            for (key, child) in self.__files.items():
+                if isinstance(child, FileLikeMock) and child.io_stats.opens:
+                    counters = stats[key] = child.io_stats.counters()
+                    child.io_stats.reset()
+                    for (name, value) in counters.items():
+                        if name != 'peak_open':
+                            other_stats[name] -= value
+            self.__stats.reset()
+        return WriteBack(files, stats, other_stats)
+
+    def merge(self, write_back):
+        """Apply the changes and add the I/O statistics of a `processes.WriteBack`.
+
+        Written ranges are applied to the files' current contents, so
+        changes to different ranges of a file (e.g. by different worker
+        processes) are all kept.
+        """
+        # pylint: disable=protected-access
+        for (path, writes, size, is_binary) in write_back.files:
+            if writes is None:
+                if self.isfile(path):
+                    self.remove(path)
+                continue
+            if not self.isfile(path):
+                data = b''.join(data for (_, data) in writes)
+                self[path].read_data = data if is_binary else data.decode('utf8')
+                continue
+            child = self[path]
+            with self.__path_lock(self.canonical_path(path)):
+                for (offset, data) in writes:
+                    child._write_at(offset, data)
+                if size < child._size():
+                    child._truncate(size)
+
+        for (path, counters) in write_back.stats.items():
+            if self.isfile(path):
+                self[path].io_stats.add(counters)
+            else:
+                # The file was removed, only count its I/O in the total.
+                self.__stats.add(counters)
+        self.__stats.add(write_back.other_stats)
+
+    def exists(self, path):
+        """Whether a path is a registered file or a directory containing one."""
+        key = self.canonical_path(path)
+        with self.__lock:
+            return key in self.__files or key in self.__lazy_files or self.__index.isdir(key)
+
+    def isfile(self, path):
+        """Whether a path is a registered file."""
+        key = self.canonical_path(path)
+        with self.__lock:
+            return key in self.__files or key in self.__lazy_files
+
+    def getsize(self, path):
+        """The size of a file's contents in bytes (0 for directories).
+
+        Raises an `OSError` if the path doesn't exist.
+        """
+        key = self.canonical_path(path)
+        with self.__lock:
+            if key in self.__lazy_files:
+                load = self.__lazy_files[key][1]
+                # Files from a real directory are sized without loading them.
+                if isinstance(load, _RealFile):
+                    return load.size()
+                self.__load_lazy_file(key)
+            child = self.__files.get(key)
+            if child is None:
+                if self.__index.isdir(key):
+                    return 0
+                raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return self.__size(key, child) or 0
+
+    def stat(self, path, *args, **kws):
+        """An `os.stat_result` for a registered file or directory.
+
+        Only the type, size and a (made up) inode number are meaningful.
+        Raises an `OSError` if the path doesn't exist.
+        """
+        # pylint: disable=unused-argument
+        key = self.canonical_path(path)
+        if self.isfile(key):
+            (mode, size) = (stat.S_IFREG | 0o644, self.getsize(key))
+        elif self.isdir(key):
+            (mode, size) = (stat.S_IFDIR | 0o755, 0)
         else:
-            self.__files[path]._reset_position()
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return os.stat_result((mode, hash(key) & 0xffffffff, 0, 1, 0, 0, size, 0, 0, 0))
 
-        self._mock_return_value = child
-        return child
+    def remove(self, path, *args, **kws):
+        """Remove a file, like `os.remove`.
+
+        Raises an `OSError` if the path is a directory or doesn't exist.
+        """
+        # pylint: disable=unused-argument
+        key = self.canonical_path(path)
+        with self.__lock:
+            if key not in self.__files and key not in self.__lazy_files:
+                code = errno.EISDIR if self.__index.isdir(key) else errno.ENOENT
+                raise OSError(code, os.strerror(code), path)
+            self.__save_entry(key)
+            self.__files.pop(key, None)
+            self.__lazy_files.pop(key, None)
+            self.__remove_from_index(key)
+
+    def rename(self, source, destination, *args, **kws):
+        """Move a file or a directory's files, like `os.rename`.
+
+        An existing destination file is replaced. Raises an `OSError` if the
+        source doesn't exist.
+        """
+        # pylint: disable=unused-argument
+        source_key = self.canonical_path(source)
+        destination_key = self.canonical_path(destination)
+        with self.__lock:
+            if self.__index.isdir(source_key):
+                keys = [
+                    os.path.join(directory, name)
+                    for (directory, _, files) in self.__index.walk(source_key)
+                    for name in files
+                ]
+            elif source_key in self.__files or source_key in self.__lazy_files:
+                keys = [source_key]
+            else:
+                raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), source)
+            if source_key == destination_key:
+                return
+
+            for key in keys:
+                new_key = destination_key + key[len(source_key):]
+                self.__save_entry(key)
+                self.__save_entry(new_key)
+                for registry in (self.__files, self.__lazy_files):
+                    if key in registry:
+                        self.__files.pop(new_key, None)
+                        self.__lazy_files.pop(new_key, None)
+                        registry[new_key] = registry.pop(key)
+                self.__remove_from_index(key)
+                self.__add_to_index(new_key)
+
+    def glob(self, pattern):
+        """The canonical paths of files and directories matching a pattern.
+
+        See `index.DirectoryIndex.glob`, relative patterns are resolved
+        against the current directory.
+        """
+        key = self.canonical_path(pattern)
+        with self.__lock:
+            return self.__index.glob(key)
+
+    def leaks(self):
+        """The handles which are still open, as `Leak` tuples."""
+        return [
+            Leak(handle.name, handle, handle.open_stack)
+            for handle in self.__stats.handles()
+        ]
+
+    def assert_no_leaks(self, ignore=()):
+        """Assert all handles (except those in `ignore`) were closed."""
+        ignored = set(id(handle) for handle in ignore)
+        leaks = [leak for leak in self.leaks() if id(leak.handle) not in ignored]
+        if not leaks:
+            return
+
+        message = ['%d file handle(s) left open:' % (len(leaks), )]
+        for leak in leaks:
+            message.append('  %r' % (leak.path, ))
+            if leak.stack is not None:
+                message.append('  opened at:')
+                message.extend(
+                    line.rstrip('\n') for line in traceback.format_list(leak.stack))
+        raise AssertionError('\n'.join(message))
+
+    @contextmanager
+    def leak_check(self):
+        """Assert handles opened within the context are closed by its end.
+
+        Handles which were already open when entering the context are
+        ignored, and so are leaks when the context exits with an exception.
+        """
+        already_open = [leak.handle for leak in self.leaks()]
+        yield self
+        self.assert_no_leaks(ignore=already_open)
 
     def __getitem__(self, path):
-        return self.__files.setdefault(path, self._get_child_mock(name=path))
+        key = self.canonical_path(path)
+        with self.__lock:
+            if key in self.__lazy_files:
+                return self.__load_lazy_file(key)
+            if key not in self.__files:
+                self.__save_entry(key)
+                self.__files[key] = self._get_child_mock(name=path)
+                self.__add_to_index(key)
+            return self.__files[key]
 
     def __setitem__(self, path, value):
         value.__enter__ = lambda self: self
         value.__exit__ = lambda self, *args: None
-        self.__files[path] = value
+        key = self.canonical_path(path)
+        with self.__lock:
+            self.__save_entry(key)
+            self.__lazy_files.pop(key, None)
+            self.__files[key] = value
+            self.__add_to_index(key)
+        if isinstance(value, FileLikeMock):
+            value._journal = self.__journal
 
     def reset_mock(self, visited=None):
         # See comment in `FileLikeMock.reset_mock`.
@@ -205,17 +1520,104 @@ class MockOpen(Mock):
             super(MockOpen, self).reset_mock()
 
         self.__files = {}
+        self.__lazy_files = {}
+        self.__index.clear()
+        # Files reused afterwards (like `return_value`) keep the journal.
+        self.__journal.clear()
         self.__read_data = ''
+        # Files reused afterwards (like `return_value`) keep adding to the total.
+        self.__stats.clear()
 
     def _get_child_mock(self, **kws):
         """Create a new FileLikeMock instance.
 
-        The new mock will inherit the parent's side_effect and read_data
-        attributes.
+        The new mock will inherit the parent's side_effect and (unless given)
+        read_data attributes. Its contents are shared through the mock's
+        content pool.
         """
         kws.update({
             '_new_parent': self,
             'side_effect': self._mock_side_effect,
-            'read_data': self.__read_data,
+            'recording': self.__recording[0],
+            'recording_limit': self.__recording[1],
+            'cost_model': self.cost_model,
+            'trace': AccessTrace() if self.__trace else None,
+            'store': self.store,
         })
-        return FileLikeMock(**kws)
+        kws.setdefault('read_data', self.__read_data)
+        child = FileLikeMock(pool=self.__pool, **kws)
+        child.io_stats.parent = self.__stats
+        child._journal = self.__journal
+        return child
+
+    def __claim_child(self, path, key):
+        """Get the file mock for a newly-opened path.
+
+        Consecutive calls to open() set `return_value` to the last file mock
+        created. If the paths differ (and the mock isn't a newly-created one,
+        evident by its name attribute being unset) we create a new file mock
+        instead of returning the previous one.
+
+        Must be called with the registry lock held. The claimed mock is named
+        right away, so no other thread opening a new path can claim it too.
+        """
+        child = self.return_value
+        if not isinstance(child.name, Mock) and key != self.canonical_path(child.name):
+            child = self._get_child_mock(_new_name='()', name=path)
+        else:
+            child.name = path
+        return child
+
+    def __path_lock(self, key):
+        """Get the lock guarding a path's file mock."""
+        lock = self.__path_locks.get(key)
+        if lock is None:
+            lock = self.__path_locks.setdefault(key, RLock())
+        return lock
+
+    def __size(self, key, child):
+        """A file mock's size (`None` for other mocks), under its path's lock.
+
+        Sizing the contents moves their shared position, which independent
+        handles may be reading from.
+        """
+        with self.__path_lock(key):
+            return _size(child)
+
+    def __add_to_index(self, key):
+        """Index a newly-registered path's directories."""
+        if isinstance(key, str):
+            self.__index.add(key)
+
+    def __save_entry(self, key):
+        """Journal a path's registry entry before it changes."""
+        if self.__journal.epoch is None:
+            return
+        if key in self.__files:
+            entry = ('file', self.__files[key])
+        elif key in self.__lazy_files:
+            entry = ('lazy', self.__lazy_files[key])
+        else:
+            entry = None
+        self.__journal.save_entry(key, entry)
+
+    def __remove_from_index(self, key):
+        """Remove an unregistered path from the index."""
+        if isinstance(key, str):
+            self.__index.remove(key)
+
+    def __open_stack(self):
+        """Capture the stack of open()'s caller, if sampled."""
+        if not self.__stack_sampling or next(self.__open_counter) % self.__stack_sampling:
+            return None
+        # Skip this method's frame, `_open`'s and its caller's (`__call__`
+        # or another interface's open()).
+        # pylint: disable=protected-access
+        return traceback.extract_stack(sys._getframe(3))
+
+    def __load_lazy_file(self, key, **kws):
+        """Create the file mock for a lazily-registered path."""
+        (path, load) = self.__lazy_files.pop(key)
+        child = self._get_child_mock(name=path, read_data=load(), **kws)
+        self.__files[key] = child
+        return child
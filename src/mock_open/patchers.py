@@ -0,0 +1,157 @@
+"""Patching file-system functions to use a `MockOpen`'s files."""
+
+import os
+from functools import wraps
+from io import TextIOWrapper
+
+from unittest.mock import patch
+
+from .fds import FileDescriptorTable, FIRST_DESCRIPTOR
+
+OPEN = 'builtins.open'
+
+
+class MultiPatcher(object):
+    """Several patchers applied together.
+
+    Like the patchers it holds, it may be used as a context manager, as a
+    function decorator or by calling `start()` and `stop()`.
+    """
+    def __init__(self, mock_open, patchers):
+        self.mock_open = mock_open
+        self.patchers = patchers
+
+    def start(self):
+        """Apply the patches, returning the `MockOpen`."""
+        started = []
+        try:
+            for patcher in self.patchers:
+                patcher.start()
+                started.append(patcher)
+        except BaseException:
+            for patcher in reversed(started):
+                patcher.stop()
+            raise
+        return self.mock_open
+
+    def stop(self):
+        """Undo the patches."""
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.stop()
+
+    def __call__(self, function):
+        @wraps(function)
+        def patched(*args, **kws):
+            # pylint: disable=missing-docstring
+            with self:
+                return function(*args, **kws)
+        return patched
+
+
+def patch_os(mock_open, patch_open=True):
+    """Serve `os` and `os.path` file-system queries from a `MockOpen`.
+
+    Patches `os.stat`, `os.lstat`, `os.listdir`, `os.remove`, `os.unlink`,
+    `os.rename` and `os.path`'s `exists`, `isfile`, `isdir` and `getsize`
+    (and the `open` builtin, unless `patch_open` is unset). Paths which
+    aren't registered raise `OSError` (ENOENT) like missing real files.
+    """
+    patchers = [
+        patch.multiple(
+            os, stat=mock_open.stat, lstat=mock_open.stat, listdir=mock_open.listdir,
+            remove=mock_open.remove, unlink=mock_open.remove, rename=mock_open.rename),
+        patch.multiple(
+            os.path, exists=mock_open.exists, isfile=mock_open.isfile,
+            isdir=mock_open.isdir, getsize=mock_open.getsize),
+    ]
+    if patch_open:
+        patchers.append(patch(OPEN, mock_open))
+    return MultiPatcher(mock_open, patchers)
+
+
+def patch_fds(mock_open, first_descriptor=FIRST_DESCRIPTOR):
+    """Emulate low-level file descriptors over a `MockOpen`'s files.
+
+    Patches `os.open`, `os.read`, `os.write`, `os.pread`, `os.pwrite`,
+    `os.lseek`, `os.close` and `os.fdopen` with a `fds.FileDescriptorTable`,
+    available as the patcher's `descriptors` attribute.
+    """
+    descriptors = FileDescriptorTable(mock_open, first_descriptor)
+    names = ['open', 'read', 'write', 'pread', 'pwrite', 'lseek', 'close', 'fdopen']
+    patcher = MultiPatcher(mock_open, [
+        patch.multiple(os, **dict(
+            (name, getattr(descriptors, name)) for name in names if hasattr(os, name))),
+    ])
+    patcher.descriptors = descriptors
+    return patcher
+
+
+def patch_pathlib(mock_open):
+    """Route `pathlib.Path`'s file methods to a `MockOpen`.
+
+    Patches `Path.open`, which opens files through the mock, as well as
+    `read_bytes`, `read_text`, `write_bytes` and `write_text`, which read
+    and replace whole files directly (see `MockOpen.read_file` and
+    `MockOpen.write_file`). Non-utf8 encodings are applied when converting
+    between text and the stored bytes: `Path.open` then opens an independent
+    binary handle through the mock (see `mocks.FileHandle`), and wraps it
+    with a `TextIOWrapper`.
+    """
+    import pathlib
+
+    def path_open(path, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
+        # pylint: disable=too-many-arguments
+        if 'b' in mode or _is_utf8(encoding):
+            kws = dict((name, value) for (name, value) in [
+                ('buffering', buffering if buffering != -1 else None),
+                ('encoding', encoding), ('errors', errors), ('newline', newline),
+            ] if value is not None)
+            return mock_open(os.fspath(path), mode, **kws)
+
+        # An independent handle, which is open even if the file's mock was
+        # closed before (the wrapper checks).
+        # pylint: disable=protected-access
+        handle = mock_open._open(os.fspath(path), mode.replace('t', '') + 'b', (), {}, True)
+        return TextIOWrapper(handle, encoding, errors, newline, write_through=True)
+
+    def read_bytes(path):
+        # pylint: disable=missing-docstring
+        return mock_open.read_file(os.fspath(path), binary=True)
+
+    def read_text(path, encoding=None, errors=None, newline=None):
+        # pylint: disable=missing-docstring,unused-argument
+        if _is_utf8(encoding):
+            return mock_open.read_file(os.fspath(path))
+        return read_bytes(path).decode(encoding, errors or 'strict')
+
+    def write_bytes(path, data):
+        # pylint: disable=missing-docstring
+        return mock_open.write_file(os.fspath(path), bytes(memoryview(data)))
+
+    def write_text(path, data, encoding=None, errors=None, newline=None):
+        # pylint: disable=missing-docstring
+        if not isinstance(data, str):
+            raise TypeError('data must be str, not %s' % (type(data).__name__, ))
+        if newline is not None:
+            data = data.replace('\n', newline)
+        if _is_utf8(encoding):
+            return mock_open.write_file(os.fspath(path), data)
+        mock_open.write_file(os.fspath(path), data.encode(encoding, errors or 'strict'))
+        return len(data)
+
+    return MultiPatcher(mock_open, [
+        patch.multiple(
+            pathlib.Path, open=path_open, read_bytes=read_bytes, read_text=read_text,
+            write_bytes=write_bytes, write_text=write_text),
+    ])
+
+
+def _is_utf8(encoding):
+    """Whether an encoding is the one fake files' text is stored in."""
+    return encoding is None or encoding.lower().replace('_', '-') in ('utf8', 'utf-8')
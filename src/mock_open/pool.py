@@ -0,0 +1,42 @@
+"""Sharing the contents of fake files with identical data."""
+
+from threading import Lock
+from weakref import WeakValueDictionary
+
+
+class SharedContents(object):
+    """Bytes shared by the fake files with the same contents.
+
+    Files keep a reference to it (and read from its `data`) until they're
+    written to.
+    """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ('data', '__weakref__')
+
+    def __init__(self, data):
+        self.data = data
+
+
+class ContentPool(object):
+    """A content-addressed pool of the bytes of fake files' contents.
+
+    Contents assigned as text or bytes are looked up by value, so files with
+    identical contents share the same bytes (text is only encoded once). The
+    bytes are copied by a file when it's first written to, and are dropped
+    from the pool once no file shares them anymore.
+    """
+    def __init__(self):
+        self.__contents = WeakValueDictionary()
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__contents)
+
+    def share(self, data):
+        """The `SharedContents` holding the bytes of some text or bytes."""
+        with self.__lock:
+            shared = self.__contents.get(data)
+            if shared is None:
+                encoded = data.encode('utf8') if isinstance(data, str) else data
+                shared = self.__contents[data] = SharedContents(encoded)
+            return shared
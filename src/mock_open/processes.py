@@ -0,0 +1,123 @@
+"""Using a `MockOpen`'s files from worker processes.
+
+`MockOpen` isn't picklable, so worker processes get a copy of its files
+instead: `MockOpen.export()` returns a picklable `ExportedFiles`, which
+`init_worker` recreates as the worker's own `MockOpen` (patching `open` and
+the `os` functions with it). It's passed once per worker as the pool's
+initializer arguments, rather than with every task::
+
+    exported = mock_open.export()
+    with ProcessPoolExecutor(initializer=init_worker, initargs=(exported, )) as pool:
+        results = list(merged(mock_open, pool.map(Task(process_file), paths)))
+
+Functions wrapped in a `Task` return the files they changed and the I/O they
+did along with their result, which `merged` applies to the parent's
+`MockOpen` (see `MockOpen.merge`).
+"""
+
+from functools import partial
+
+from .patchers import patch_os
+
+# The worker process's `MockOpen` (see `init_worker`).
+_WORKER_MOCK_OPEN = None
+
+
+def _identity(value):
+    # pylint: disable=missing-docstring
+    return value
+
+
+class ExportedFiles(object):
+    """A picklable copy of a `MockOpen`'s files (see `MockOpen.export`).
+
+    Holds the contents of the files (as text or bytes), the loaders of lazy
+    files, and the settings to create a similar `MockOpen` with.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, cls, settings, files, lazy_files):
+        self.cls = cls
+        self.settings = settings
+        self.files = files
+        self.lazy_files = lazy_files
+
+    def create(self):
+        """A new `MockOpen` with the exported files (loaded when first accessed)."""
+        mock_open = self.cls(**self.settings)
+        for (path, contents) in self.files.items():
+            mock_open.add_lazy_file(path, partial(_identity, contents))
+        for (path, load) in self.lazy_files.items():
+            mock_open.add_lazy_file(path, load)
+        return mock_open
+
+
+class WriteBack(object):
+    """The changes a worker process made to its files (see `MockOpen.write_back`).
+
+    `files` lists a (path, writes, size, is_binary) tuple per changed file,
+    where `writes` are the (offset, bytes) pairs to write and `size` the
+    file's size afterwards, or both are `None` if the file was removed.
+    `stats` maps paths to the counters of the I/O done on them (see
+    `stats.FileStats.counters`), and `other_stats` counts the rest of the
+    I/O (done on files which were removed since).
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, files, stats, other_stats):
+        self.files = files
+        self.stats = stats
+        self.other_stats = other_stats
+
+
+class TaskResult(object):
+    """The result of a `Task`, with the changes it made."""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, result, write_back):
+        self.result = result
+        self.write_back = write_back
+
+
+def init_worker(exported):
+    """Set up a worker process to use a copy of exported files.
+
+    Pass it as the `initializer` of a `multiprocessing.Pool` or a
+    `concurrent.futures.ProcessPoolExecutor`, with `(exported, )` as its
+    arguments. Returns the worker's `MockOpen`, which `open` and the `os`
+    functions are patched with (see `patchers.patch_os`).
+    """
+    # pylint: disable=global-statement
+    global _WORKER_MOCK_OPEN
+    _WORKER_MOCK_OPEN = exported.create()
+    return patch_os(_WORKER_MOCK_OPEN).start()
+
+
+class Task(object):
+    """A picklable wrapper running a function in worker processes.
+
+    Calling it (in a process set up by `init_worker`) calls the function and
+    returns a `TaskResult` with the function's result and a `WriteBack` of
+    the changes it made. The changes are lost if the function raises.
+    `function` itself must be picklable (e.g. defined at a module's top
+    level).
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, *args, **kws):
+        mock_open = _WORKER_MOCK_OPEN
+        if mock_open is None:
+            raise RuntimeError('Tasks must run in processes set up by init_worker()')
+
+        snapshot = mock_open.snapshot()
+        try:
+            result = self.function(*args, **kws)
+            return TaskResult(result, mock_open.write_back(snapshot))
+        finally:
+            mock_open.release(snapshot)
+
+
+def merged(mock_open, results):
+    """Merge the changes of `TaskResult`s into a `MockOpen`, yielding their results."""
+    for result in results:
+        mock_open.merge(result.write_back)
+        yield result.result
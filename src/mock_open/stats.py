@@ -0,0 +1,136 @@
+"""I/O accounting for fake files."""
+
+from threading import Lock
+
+# The counters, which are added up when merging stats (except for the peak).
+COUNTERS = (
+    'opens', 'closes', 'reads', 'bytes_read', 'writes', 'bytes_written', 'seeks', 'peak_open',
+)
+
+
+class FileStats(object):
+    """Counters of the I/O done on a fake file (or on all of them).
+
+    * `opens`, `closes`: The number of handles opened and closed.
+    * `reads`, `bytes_read`: Calls to read/readline/readlines (including
+      iterating over lines) and the amount of data they returned.
+    * `writes`, `bytes_written`: Calls to write/writelines and the amount of
+      data they wrote.
+    * `seeks`: Calls to seek.
+    * `open_handles`, `peak_open`: The number of handles currently open and
+      the most that were open at once.
+
+    Sizes are measured in bytes, textual data by its utf8 encoding. Updates are also applied
+    to the `parent` stats, if any, which aggregate several files (and share
+    their lock, so an update only acquires a single lock).
+    """
+    def __init__(self, parent=None):
+        self.__lock = Lock()
+        self.__parent = None
+        self.__handles = {}
+        self.parent = parent
+        self.reset()
+
+    @property
+    def parent(self):
+        # pylint: disable=missing-docstring
+        return self.__parent
+
+    @parent.setter
+    def parent(self, parent):
+        # pylint: disable=missing-docstring
+        self.__parent = parent
+        self.__lock = parent.__lock if parent is not None else Lock()
+
+    def reset(self):
+        """Zero the counters (but keep tracking the handles still open)."""
+        with self.__lock:
+            self.opens = 0
+            self.closes = 0
+            self.reads = 0
+            self.bytes_read = 0
+            self.writes = 0
+            self.bytes_written = 0
+            self.seeks = 0
+            self.peak_open = len(self.__handles)
+
+    def clear(self):
+        """Zero the counters and forget the handles which are still open."""
+        with self.__lock:
+            self.__handles.clear()
+        self.reset()
+
+    @property
+    def open_handles(self):
+        # pylint: disable=missing-docstring
+        return len(self.__handles)
+
+    def handles(self):
+        """The handles which are currently open."""
+        with self.__lock:
+            return list(self.__handles.values())
+
+    def record(self, kind, size=0):
+        """Account for a 'read', 'write' or 'seek' call."""
+        with self.__lock:
+            stats = self
+            while stats is not None:
+                if kind == 'read':
+                    stats.reads += 1
+                    stats.bytes_read += size
+                elif kind == 'write':
+                    stats.writes += 1
+                    stats.bytes_written += size
+                elif kind == 'seek':
+                    stats.seeks += 1
+                stats = stats.__parent
+
+    def counters(self):
+        """The counters, as a dictionary (which may be passed to `add`)."""
+        with self.__lock:
+            return dict((name, getattr(self, name)) for name in COUNTERS)
+
+    def add(self, counters):
+        """Add counters (e.g. counted in another process) to the stats.
+
+        `peak_open` is the larger of both peaks.
+        """
+        with self.__lock:
+            stats = self
+            while stats is not None:
+                for (name, value) in counters.items():
+                    if name == 'peak_open':
+                        stats.peak_open = max(stats.peak_open, value)
+                    else:
+                        setattr(stats, name, getattr(stats, name) + value)
+                stats = stats.__parent
+
+    def opened(self, handle):
+        """Account for a handle being opened.
+
+        A handle which is opened again while open (like a `FileLikeMock`
+        returned from every call to open()) only counts once in `open_handles`.
+        """
+        with self.__lock:
+            stats = self
+            while stats is not None:
+                stats.opens += 1
+                stats.__handles[id(handle)] = handle
+                stats.peak_open = max(stats.peak_open, len(stats.__handles))
+                stats = stats.__parent
+
+    def closed(self, handle):
+        """Account for a handle being closed, unless it already was."""
+        with self.__lock:
+            stats = self
+            while stats is not None:
+                if stats.__handles.pop(id(handle), None) is None:
+                    return
+                stats.closes += 1
+                stats = stats.__parent
+
+    def __repr__(self):
+        return '<%s opens=%d closes=%d reads=%d bytes_read=%d writes=%d ' \
+            'bytes_written=%d seeks=%d peak_open=%d>' % (
+                type(self).__name__, self.opens, self.closes, self.reads, self.bytes_read,
+                self.writes, self.bytes_written, self.seeks, self.peak_open)
@@ -0,0 +1,537 @@
+"""Alternative backing stores for fake files' contents."""
+
+from io import RawIOBase, UnsupportedOperation
+from mmap import mmap, ACCESS_COPY, ACCESS_READ
+# Import these directly so patching the `os` module in tests doesn't affect
+# stores backed by real files.
+from os import SEEK_SET, SEEK_CUR, SEEK_END, O_RDONLY, open as os_open, close as os_close, fstat
+
+# Default size of the chunks pulled from a streaming store's source.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _to_bytes(chunk):
+    """Encode textual chunks, leave binary ones as they are."""
+    if isinstance(chunk, bytes):
+        return chunk
+    if isinstance(chunk, (bytearray, memoryview)):
+        return bytes(chunk)
+    return chunk.encode('utf8')
+
+
+class StreamingStore(RawIOBase):
+    """A read-only binary file pulling its contents from a source on demand.
+
+    `source` is either a callable taking `(offset, size)` and returning up to
+    `size` bytes starting at `offset` (fewer only at the end of the file), or
+    an iterable of chunks. Textual chunks are encoded as utf8.
+
+    Only a single chunk is held in memory at a time. Seeking backwards past it
+    restarts an iterable source, which isn't possible for one-shot iterators
+    (generators, for example).
+    """
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        super(StreamingStore, self).__init__()
+        if not callable(source):
+            # Make sure the source is iterable, without consuming it yet.
+            iter(source)
+
+        self.__source = source
+        self.__chunk_size = chunk_size
+        self.__iterator = None
+        self.__chunk_start = 0
+        self.__chunk = b''
+        self.__size = None
+        self.__position = 0
+
+    def readable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def seekable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def writable(self):
+        # pylint: disable=missing-docstring
+        return False
+
+    def tell(self):
+        # pylint: disable=missing-docstring
+        return self.__position
+
+    def seek(self, offset, whence=SEEK_SET):
+        # pylint: disable=missing-docstring
+        if whence == SEEK_SET:
+            position = offset
+        elif whence == SEEK_CUR:
+            position = self.__position + offset
+        elif whence == SEEK_END:
+            position = self.size() + offset
+        else:
+            raise ValueError('invalid whence (%r)' % (whence, ))
+
+        if position < 0:
+            raise ValueError('negative seek value %r' % (position, ))
+        self.__position = position
+        return position
+
+    def read(self, size=-1):
+        # pylint: disable=missing-docstring
+        if size is None or size < 0:
+            size = None
+
+        parts = []
+        position = self.__position
+        while size is None or 0 < size:
+            (start, chunk) = self._chunk_at(position)
+            offset = position - start
+            if len(chunk) <= offset:
+                break
+
+            part = chunk[offset:] if size is None else chunk[offset:offset + size]
+            parts.append(part)
+            position += len(part)
+            if size is not None:
+                size -= len(part)
+
+        self.__position = position
+        return b''.join(parts)
+
+    read1 = read
+    readall = read
+
+    def readinto(self, buffer):
+        # pylint: disable=missing-docstring
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        # pylint: disable=missing-docstring
+        if size is None or size < 0:
+            size = None
+
+        parts = []
+        position = self.__position
+        while size is None or 0 < size:
+            (start, chunk) = self._chunk_at(position)
+            offset = position - start
+            if len(chunk) <= offset:
+                break
+
+            end = len(chunk) if size is None else min(len(chunk), offset + size)
+            newline = chunk.find(b'\n', offset, end)
+            if newline != -1:
+                end = newline + 1
+
+            parts.append(chunk[offset:end])
+            position += end - offset
+            if size is not None:
+                size -= end - offset
+            if newline != -1:
+                break
+
+        self.__position = position
+        return b''.join(parts)
+
+    def write(self, data):
+        # pylint: disable=missing-docstring
+        raise UnsupportedOperation('not writable')
+
+    def getvalue(self):
+        """Read the whole contents, regardless of the current position.
+
+        Note this materializes the entire file in memory.
+        """
+        position = self.__position
+        try:
+            self.__position = 0
+            return self.read()
+        finally:
+            self.__position = position
+
+    def size(self):
+        """The size of the file, pulling the rest of the source if needed."""
+        while self.__size is None:
+            self._chunk_at(self.__chunk_start + len(self.__chunk))
+        return self.__size
+
+    def _chunk_at(self, offset):
+        """Return a (start, chunk) pair containing the given offset.
+
+        The chunk is empty (or ends before the offset) past the end of file.
+        """
+        if self.__chunk_start <= offset < self.__chunk_start + len(self.__chunk):
+            return (self.__chunk_start, self.__chunk)
+        if self.__size is not None and self.__size <= offset:
+            return (self.__size, b'')
+
+        if callable(self.__source):
+            start = offset - offset % self.__chunk_size
+            chunk = _to_bytes(self.__source(start, self.__chunk_size))
+            if len(chunk) < self.__chunk_size:
+                self.__size = start + len(chunk)
+        else:
+            (start, chunk) = self._next_chunks(offset)
+
+        self.__chunk_start = start
+        self.__chunk = chunk
+        return (start, chunk)
+
+    def _next_chunks(self, offset):
+        """Advance an iterable source until reaching the given offset."""
+        start = self.__chunk_start
+        chunk = self.__chunk
+        if self.__iterator is None or offset < start:
+            self.__iterator = iter(self.__source)
+            if self.__iterator is self.__source and (start != 0 or chunk):
+                raise UnsupportedOperation(
+                    "can't seek backwards in a one-shot source")
+            (start, chunk) = (0, b'')
+
+        while start + len(chunk) <= offset:
+            next_chunk = next(self.__iterator, None)
+            if next_chunk is None:
+                self.__size = start + len(chunk)
+                break
+
+            start += len(chunk)
+            chunk = _to_bytes(next_chunk)
+
+        return (start, chunk)
+
+
+class MappedStore(RawIOBase):
+    """A binary file backed by a memory-mapped real file.
+
+    The real file is never modified. When `writable`, the mapping is
+    copy-on-write: writes within the real file's size modify private copies
+    of the mapped pages, writes past its end go to an in-memory overlay.
+    Otherwise the store is read-only.
+
+    Reads don't load the real file into memory, and `view()` exposes its
+    contents without copying them.
+    """
+    def __init__(self, path, writable=True):
+        super(MappedStore, self).__init__()
+        descriptor = os_open(path, O_RDONLY)
+        try:
+            self.__mapped_size = fstat(descriptor).st_size
+            self.__map = None
+            if self.__mapped_size:
+                self.__map = mmap(
+                    descriptor, 0, access=ACCESS_COPY if writable else ACCESS_READ)
+        finally:
+            os_close(descriptor)
+
+        self.name = path
+        self.__writable = writable
+        self.__tail = bytearray()
+        self.__size = self.__mapped_size
+        self.__position = 0
+
+    def readable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def seekable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def writable(self):
+        # pylint: disable=missing-docstring
+        return self.__writable
+
+    def tell(self):
+        # pylint: disable=missing-docstring
+        return self.__position
+
+    def seek(self, offset, whence=SEEK_SET):
+        # pylint: disable=missing-docstring
+        if whence == SEEK_SET:
+            position = offset
+        elif whence == SEEK_CUR:
+            position = self.__position + offset
+        elif whence == SEEK_END:
+            position = self.__size + offset
+        else:
+            raise ValueError('invalid whence (%r)' % (whence, ))
+
+        if position < 0:
+            raise ValueError('negative seek value %r' % (position, ))
+        self.__position = position
+        return position
+
+    def read(self, size=-1):
+        # pylint: disable=missing-docstring
+        start = self.__position
+        end = self.__size if size is None or size < 0 else min(self.__size, start + size)
+        if end <= start:
+            return b''
+
+        self.__position = end
+        return self._slice(start, end)
+
+    read1 = read
+    readall = read
+
+    def readinto(self, buffer):
+        # pylint: disable=missing-docstring
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        # pylint: disable=missing-docstring
+        start = self.__position
+        end = self.__size if size is None or size < 0 else min(self.__size, start + size)
+        if end <= start:
+            return b''
+
+        newline = -1
+        if self.__map is not None and start < self.__mapped_size:
+            newline = self.__map.find(b'\n', start, min(end, self.__mapped_size))
+        if newline == -1 and self.__mapped_size < end:
+            newline = self.__tail.find(
+                b'\n', max(start - self.__mapped_size, 0), end - self.__mapped_size)
+            if newline != -1:
+                newline += self.__mapped_size
+        if newline != -1:
+            end = newline + 1
+
+        self.__position = end
+        return self._slice(start, end)
+
+    def write(self, data):
+        # pylint: disable=missing-docstring
+        if not self.__writable:
+            raise UnsupportedOperation('not writable')
+
+        data = bytes(data)
+        if self.__size < self.__position:
+            self._write_at(self.__size, b'\0' * (self.__position - self.__size))
+        self._write_at(self.__position, data)
+        self.__position += len(data)
+        return len(data)
+
+    def truncate(self, size=None):
+        # pylint: disable=missing-docstring
+        if not self.__writable:
+            raise UnsupportedOperation('not writable')
+
+        if size is None:
+            size = self.__position
+        if self.__size < size:
+            self._write_at(self.__size, b'\0' * (size - self.__size))
+        del self.__tail[max(size - self.__mapped_size, 0):]
+        self.__size = size
+        return size
+
+    def close(self):
+        # pylint: disable=missing-docstring
+        if self.__map is not None:
+            try:
+                self.__map.close()
+            except BufferError:
+                # Views of the mapping are still alive, leave it to the GC.
+                pass
+        super(MappedStore, self).close()
+
+    def getvalue(self):
+        """Read the whole contents, regardless of the current position."""
+        return self._slice(0, self.__size)
+
+    def view(self):
+        """A read-only view of the whole contents which doesn't copy them.
+
+        Returns `None` when the contents aren't contiguous in memory (the
+        file was written past the real file's end).
+        """
+        if self.__map is None or self.__mapped_size < self.__size:
+            return None
+
+        view = memoryview(self.__map)[:self.__size]
+        return view.toreadonly() if hasattr(view, 'toreadonly') else view
+
+    def _slice(self, start, end):
+        """Return the contents between two offsets within the file."""
+        mapped_size = self.__mapped_size
+        if end <= mapped_size:
+            return self.__map[start:end]
+        if mapped_size <= start:
+            return bytes(self.__tail[start - mapped_size:end - mapped_size])
+        return self.__map[start:] + bytes(self.__tail[:end - mapped_size])
+
+    def _write_at(self, offset, data):
+        """Write data at the given offset, overlaying the mapped file's tail."""
+        end = offset + len(data)
+        mapped_size = self.__mapped_size
+        if offset < mapped_size:
+            split = min(end, mapped_size)
+            self.__map[offset:split] = data[:split - offset]
+        if mapped_size < end:
+            tail_offset = max(offset - mapped_size, 0)
+            self.__tail[tail_offset:end - mapped_size] = data[max(mapped_size - offset, 0):]
+        self.__size = max(self.__size, end)
+
+
+class ChunkedStore(RawIOBase):
+    """A writable in-memory binary file, kept as a list of fixed-size chunks.
+
+    A `BytesIO` keeps its contents contiguous, and copies them whole when
+    it's first written after sharing them (e.g. through `getvalue()`) or when
+    it outgrows its buffer. Here, writing only touches the chunks covering the
+    written range, so appends and overwrites cost O(chunk size) instead of
+    O(file size).
+
+    Chunks are immutable `bytes` until written to, so `copy()` shares them
+    with the copy and only the chunks written afterwards are copied.
+    """
+    def __init__(self, data=b'', chunk_size=DEFAULT_CHUNK_SIZE):
+        super(ChunkedStore, self).__init__()
+        data = _to_bytes(data)
+        self.__chunk_size = chunk_size
+        self.__chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        self.__size = len(data)
+        self.__position = 0
+
+    def readable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def seekable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def writable(self):
+        # pylint: disable=missing-docstring
+        return True
+
+    def tell(self):
+        # pylint: disable=missing-docstring
+        return self.__position
+
+    def seek(self, offset, whence=SEEK_SET):
+        # pylint: disable=missing-docstring
+        if whence == SEEK_SET:
+            position = offset
+        elif whence == SEEK_CUR:
+            position = self.__position + offset
+        elif whence == SEEK_END:
+            position = self.__size + offset
+        else:
+            raise ValueError('invalid whence (%r)' % (whence, ))
+
+        if position < 0:
+            raise ValueError('negative seek value %r' % (position, ))
+        self.__position = position
+        return position
+
+    def read(self, size=-1):
+        # pylint: disable=missing-docstring
+        start = self.__position
+        end = self.__size if size is None or size < 0 else min(self.__size, start + size)
+        if end <= start:
+            return b''
+
+        self.__position = end
+        return self._slice(start, end)
+
+    read1 = read
+    readall = read
+
+    def readinto(self, buffer):
+        # pylint: disable=missing-docstring
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        # pylint: disable=missing-docstring
+        start = self.__position
+        end = self.__size if size is None or size < 0 else min(self.__size, start + size)
+        if end <= start:
+            return b''
+
+        position = start
+        while position < end:
+            (index, offset) = divmod(position, self.__chunk_size)
+            chunk_end = min(len(self.__chunks[index]), offset + end - position)
+            newline = self.__chunks[index].find(b'\n', offset, chunk_end)
+            if newline != -1:
+                end = position + newline + 1 - offset
+                break
+            position += chunk_end - offset
+
+        self.__position = end
+        return self._slice(start, end)
+
+    def write(self, data):
+        # pylint: disable=missing-docstring
+        data = bytes(data)
+        if self.__size < self.__position:
+            self._write_at(self.__size, b'\0' * (self.__position - self.__size))
+        self._write_at(self.__position, data)
+        self.__position += len(data)
+        return len(data)
+
+    def truncate(self, size=None):
+        # pylint: disable=missing-docstring
+        if size is None:
+            size = self.__position
+        if self.__size < size:
+            self._write_at(self.__size, b'\0' * (size - self.__size))
+            return size
+
+        (index, offset) = divmod(size, self.__chunk_size)
+        del self.__chunks[index + 1 if offset else index:]
+        if offset:
+            self.__chunks[index] = self.__chunks[index][:offset]
+        self.__size = size
+        return size
+
+    def getvalue(self):
+        """Read the whole contents, regardless of the current position."""
+        return b''.join(self.__chunks)
+
+    def size(self):
+        """The size of the contents."""
+        return self.__size
+
+    def copy(self):
+        """An independent copy of the contents, sharing the chunks until written."""
+        # Freeze the chunks written so far, so both stores copy them on write.
+        self.__chunks = [bytes(chunk) for chunk in self.__chunks]
+        copy = ChunkedStore(chunk_size=self.__chunk_size)
+        copy.__chunks = list(self.__chunks)
+        copy.__size = self.__size
+        return copy
+
+    def _slice(self, start, end):
+        """Return the contents between two offsets within the file."""
+        parts = []
+        while start < end:
+            (index, offset) = divmod(start, self.__chunk_size)
+            part = self.__chunks[index][offset:offset + end - start]
+            parts.append(part)
+            start += len(part)
+        return bytes(parts[0]) if len(parts) == 1 else b''.join(parts)
+
+    def _write_at(self, offset, data):
+        """Write data at an offset within the file (or at its end)."""
+        chunk_size = self.__chunk_size
+        written = 0
+        while written < len(data):
+            (index, start) = divmod(offset + written, chunk_size)
+            count = min(chunk_size - start, len(data) - written)
+            part = data[written:written + count]
+            if index == len(self.__chunks):
+                self.__chunks.append(bytearray(part))
+            else:
+                chunk = self.__chunks[index]
+                if not isinstance(chunk, bytearray):
+                    chunk = self.__chunks[index] = bytearray(chunk)
+                chunk[start:start + count] = part
+            written += count
+        self.__size = max(self.__size, offset + len(data))
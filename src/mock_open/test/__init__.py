@@ -2,5 +2,16 @@
 # pylint: disable=wildcard-import
 
 from .test_mocks import *
+from .test_stores import *
+from .test_costs import *
+from .test_stats import *
+from .test_tracing import *
+from .test_index import *
+from .test_patchers import *
+from .test_fds import *
+from .test_journal import *
+from .test_pool import *
+from .test_processes import *
+from .test_async_mocks import *
 from .cpython.testmock import *
 from .cpython.testwith import *
@@ -0,0 +1,109 @@
+"""Test cases for the async_mocks module."""
+
+import asyncio
+import unittest
+from mock_open import MockOpen
+from mock_open.async_mocks import AsyncMockOpen, AsyncFileHandle
+
+from unittest.mock import call
+
+
+def _run(coroutine):
+    # pylint: disable=missing-docstring
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncMockOpen(unittest.TestCase):
+    """Test the AsyncMockOpen and AsyncFileHandle classes."""
+    def test_shared_files(self):
+        """Files are shared with the underlying `MockOpen`."""
+        mock_open = MockOpen()
+        mock_open['/path/to/input'].read_data = 'Some input'
+        async_open = AsyncMockOpen(mock_open)
+
+        async def copy():
+            # pylint: disable=missing-docstring
+            async with async_open('/path/to/input', 'r') as source:
+                self.assertIsInstance(source, AsyncFileHandle)
+                self.assertEqual('/path/to/input', source.name)
+                data = await source.read()
+            async with async_open('/path/to/output', 'w') as destination:
+                await destination.write(data.upper())
+            return destination
+
+        destination = _run(copy())
+        self.assertTrue(destination.closed)
+        self.assertEqual('SOME INPUT', mock_open['/path/to/output'].read_data)
+        mock_open.assert_has_calls([call('/path/to/output', 'w'), call().write('SOME INPUT')])
+
+    def test_await_open(self):
+        """`open` may be awaited instead of used as a context manager."""
+        async_open = AsyncMockOpen()
+        async_open['/path/to/file'].read_data = b'\x00\x01'
+
+        async def read():
+            # pylint: disable=missing-docstring
+            handle = await async_open('/path/to/file', 'rb')
+            await handle.seek(1)
+            data = await handle.read()
+            await handle.close()
+            return data
+
+        self.assertEqual(b'\x01', _run(read()))
+        async_open.mock_open['/path/to/file'].close.assert_called_once_with()
+
+    def test_async_iteration(self):
+        """Iterate over the file's lines with `async for`."""
+        async_open = AsyncMockOpen(MockOpen(read_data='first\nsecond\n'))
+
+        async def read_lines():
+            # pylint: disable=missing-docstring
+            async with async_open('/path/to/file') as handle:
+                return [line async for line in handle]
+
+        self.assertEqual(['first\n', 'second\n'], _run(read_lines()))
+
+    def test_yields(self):
+        """Yielding to the event loop interleaves concurrent readers deterministically."""
+        async_open = AsyncMockOpen(
+            MockOpen(read_data='1\n2\n3\n', independent_handles=True), yields=1)
+        order = []
+
+        async def reader(name):
+            # pylint: disable=missing-docstring
+            async with async_open('/path/to/file') as handle:
+                async for line in handle:
+                    order.append((name, line))
+
+        async def read_concurrently():
+            # pylint: disable=missing-docstring
+            await asyncio.gather(reader('a'), reader('b'))
+
+        _run(read_concurrently())
+        self.assertEqual([
+            ('a', '1\n'), ('b', '1\n'),
+            ('a', '2\n'), ('b', '2\n'),
+            ('a', '3\n'), ('b', '3\n'),
+        ], order)
+
+    def test_latency(self):
+        """Each operation sleeps for the configured latency."""
+        sleeps = []
+        async def fake_sleep(delay):
+            # pylint: disable=missing-docstring
+            sleeps.append(delay)
+
+        async_open = AsyncMockOpen(latency=0.5, sleep=fake_sleep)
+
+        async def write():
+            # pylint: disable=missing-docstring
+            async with async_open('/path/to/file', 'w') as handle:
+                await handle.write('Some text')
+
+        _run(write())
+        # Opening, writing and closing.
+        self.assertEqual([0.5, 0.5, 0.5], sleeps)
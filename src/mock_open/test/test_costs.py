@@ -0,0 +1,93 @@
+"""Test cases for the costs module."""
+
+import unittest
+from mock_open.mocks import MockOpen
+from mock_open.costs import CostModel, VirtualClock
+
+from unittest.mock import patch
+
+OPEN = 'builtins.open'
+
+
+class TestCostModel(unittest.TestCase):
+    """Test simulating the time spent on file I/O."""
+    def test_latency_and_throughput(self):
+        """Calls cost their latency plus their data's transfer time."""
+        model = CostModel(latency=0.5, bytes_per_second=100, open_cost=2)
+        mock_open = MockOpen(read_data=b'x' * 300, cost_model=model)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'rb') as handle:
+                handle.read(100)
+                handle.seek(0)
+                handle.read()
+
+        # Opening, reading 100 bytes, seeking and reading 300 bytes.
+        self.assertEqual(2 + 1.5 + 0.5 + 3.5, model.io_time)
+        self.assertEqual(model.io_time, model.clock())
+        self.assertEqual(model.io_time, mock_open['/path/to/file'].io_time)
+        self.assertEqual(model.io_time, mock_open.io_time)
+
+    def test_writes_and_iteration(self):
+        """Written and iterated data is charged as well."""
+        model = CostModel(bytes_per_second=10)
+        mock_open = MockOpen(cost_model=model)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'w') as handle:
+                handle.write('line 1\n')
+                handle.writelines(line for line in ['line 2\n', 'line 3\n'])
+            with open('/path/to/file', 'r') as handle:
+                lines = list(handle)
+
+        self.assertEqual(['line 1\n', 'line 2\n', 'line 3\n'], lines)
+        self.assertAlmostEqual(2 * 2.1, model.io_time)
+        self.assertEqual('line 1\nline 2\nline 3\n', mock_open['/path/to/file'].read_data)
+
+    def test_per_path_model(self):
+        """A file's own cost model overrides the global one."""
+        clock = VirtualClock(start=100)
+        slow = CostModel(latency=1, clock=clock)
+        fast = CostModel(latency=0.25, clock=clock)
+        mock_open = MockOpen(cost_model=fast)
+        mock_open['/path/to/slow'].cost_model = slow
+
+        with patch(OPEN, mock_open):
+            open('/path/to/slow', 'r').read()
+            open('/path/to/fast', 'r').read()
+
+        self.assertEqual(1, slow.io_time)
+        self.assertEqual(1, mock_open['/path/to/slow'].io_time)
+        self.assertEqual(0.25, fast.io_time)
+        self.assertEqual(101.25, clock())
+
+        slow.reset()
+        self.assertEqual(0, slow.io_time)
+        self.assertEqual(101.25, clock())
+
+    def test_no_model(self):
+        """Without a cost model, file I/O takes no time."""
+        mock_open = MockOpen(read_data='Some data')
+
+        with patch(OPEN, mock_open):
+            open('/path/to/file', 'r').read()
+
+        self.assertEqual(0, mock_open.io_time)
+
+    def test_custom_clock(self):
+        """Costs may be charged to any clock, e.g. one that really sleeps."""
+        class SleepingClock(object):
+            # pylint: disable=missing-docstring,too-few-public-methods
+            def __init__(self):
+                self.sleeps = []
+
+            def advance(self, seconds):
+                self.sleeps.append(seconds)
+
+        clock = SleepingClock()
+        mock_open = MockOpen(cost_model=CostModel(open_cost=0.1, clock=clock))
+
+        with patch(OPEN, mock_open):
+            open('/path/to/file', 'r').tell()
+
+        self.assertEqual([0.1], clock.sleeps)
@@ -0,0 +1,120 @@
+"""Test cases for the fds module."""
+
+import errno
+import os
+import unittest
+from os import SEEK_END
+from mock_open.mocks import MockOpen
+from mock_open.fds import FileDescriptorTable, FIRST_DESCRIPTOR
+from mock_open.patchers import patch_fds
+
+from unittest.mock import call
+
+
+class TestFileDescriptorTable(unittest.TestCase):
+    """Test emulating file descriptors."""
+    def setUp(self):
+        self.mock_open = MockOpen()
+        self.mock_open['/path/to/file'].read_data = b'0123456789'
+
+    def test_read_and_write(self):
+        """Read and write through descriptors, each with its own position."""
+        with patch_fds(self.mock_open):
+            reader = os.open('/path/to/file', os.O_RDONLY)
+            writer = os.open('/path/to/file', os.O_WRONLY)
+            self.assertLessEqual(FIRST_DESCRIPTOR, reader)
+
+            self.assertEqual(b'012', os.read(reader, 3))
+            self.assertEqual(2, os.write(writer, b'ab'))
+            self.assertEqual(b'3456', os.read(reader, 4))
+            self.assertEqual(5, os.lseek(writer, -5, SEEK_END))
+            os.write(writer, bytearray(b'XY'))
+            self.assertEqual(b'78', os.read(reader, 2))
+            os.close(reader)
+            os.close(writer)
+
+        self.assertEqual(b'ab234XY789', self.mock_open['/path/to/file'].read_data)
+        self.mock_open.assert_has_calls([
+            call('/path/to/file', 'rb'),
+            call('/path/to/file', 'wb'),
+        ])
+        self.mock_open['/path/to/file'].read.assert_has_calls([call(3), call(4), call(2)])
+        self.assertEqual(0, self.mock_open.stats_total().open_handles)
+
+    def test_positional_io(self):
+        """pread and pwrite don't move the descriptor's position."""
+        descriptors = FileDescriptorTable(self.mock_open)
+        descriptor = descriptors.open('/path/to/file', os.O_RDWR)
+
+        self.assertEqual(b'01', descriptors.read(descriptor, 2))
+        self.assertEqual(b'789', descriptors.pread(descriptor, 10, 7))
+        self.assertEqual(3, descriptors.pwrite(descriptor, b'abc', 4))
+        self.assertEqual(b'23ab', descriptors.read(descriptor, 4))
+        descriptors.close(descriptor)
+        self.assertEqual(b'0123abc789', self.mock_open['/path/to/file'].read_data)
+
+    def test_flags(self):
+        """Honor O_CREAT, O_EXCL, O_TRUNC and O_APPEND, and access modes."""
+        descriptors = FileDescriptorTable(self.mock_open)
+
+        with self.assertRaises(OSError) as context:
+            descriptors.open('/path/to/missing', os.O_RDONLY)
+        self.assertEqual(errno.ENOENT, context.exception.errno)
+        with self.assertRaises(OSError) as context:
+            descriptors.open('/path/to/file', os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        self.assertEqual(errno.EEXIST, context.exception.errno)
+
+        descriptor = descriptors.open('/path/to/new', os.O_WRONLY | os.O_CREAT)
+        descriptors.write(descriptor, b'new')
+        with self.assertRaises(OSError) as context:
+            descriptors.read(descriptor, 1)
+        self.assertEqual(errno.EBADF, context.exception.errno)
+        descriptors.close(descriptor)
+        self.assertEqual(b'new', self.mock_open['/path/to/new'].read_data)
+
+        descriptor = descriptors.open('/path/to/file', os.O_WRONLY | os.O_APPEND)
+        self.mock_open['/path/to/file'].seek.reset_mock()
+        descriptors.write(descriptor, b'!')
+        descriptors.lseek(descriptor, 0)
+        descriptors.write(descriptor, b'?')
+        descriptors.close(descriptor)
+        self.assertEqual(b'0123456789!?', self.mock_open['/path/to/file'].read_data)
+        # Appending doesn't record seeks of its own.
+        self.assertEqual(1, self.mock_open['/path/to/file'].seek.call_count)
+
+        descriptor = descriptors.open('/path/to/file', os.O_WRONLY | os.O_TRUNC)
+        descriptors.write(descriptor, b'short')
+        descriptors.close(descriptor)
+        self.assertEqual(b'short', self.mock_open['/path/to/file'].read_data)
+
+        with self.assertRaises(OSError) as context:
+            descriptors.close(descriptor)
+        self.assertEqual(errno.EBADF, context.exception.errno)
+
+    def test_fdopen(self):
+        """Wrap descriptors with file objects."""
+        self.mock_open['/path/to/text'].read_data = 'line 1\nline 2\n'
+
+        with patch_fds(self.mock_open) as mock_open:
+            descriptor = os.open('/path/to/text', os.O_RDONLY)
+            os.read(descriptor, 7)
+            with os.fdopen(descriptor, 'r') as handle:
+                self.assertEqual(descriptor, handle.fileno())
+                self.assertEqual('line', handle.read(4))
+                # The descriptor itself still reads bytes.
+                self.assertEqual(b' 2', os.read(descriptor, 2))
+                self.assertEqual(['\n'], list(handle))
+            with self.assertRaises(OSError):
+                os.read(descriptor, 1)
+
+        self.assertIs(self.mock_open, mock_open)
+
+    def test_real_descriptors(self):
+        """Unknown descriptors are passed to the real functions."""
+        (read_end, write_end) = os.pipe()
+        with patch_fds(self.mock_open) as mock_open:
+            os.write(write_end, b'data')
+            self.assertEqual(b'data', os.read(read_end, 4))
+            os.close(read_end)
+            os.close(write_end)
+        self.assertFalse(mock_open.called)
@@ -0,0 +1,58 @@
+"""Test cases for the index module."""
+
+import posixpath
+import unittest
+from mock_open.index import DirectoryIndex
+
+
+class TestDirectoryIndex(unittest.TestCase):
+    """Test indexing the directories of paths."""
+    def setUp(self):
+        self.index = DirectoryIndex(posixpath)
+        for path in ['/a/b/c.txt', '/a/b/d.py', '/a/e.txt', '/a/f/g/h.txt', '/a/.hidden.txt']:
+            self.index.add(path)
+
+    def test_listdir(self):
+        """List directories' entries."""
+        self.assertEqual(['a'], self.index.listdir('/'))
+        self.assertEqual(['.hidden.txt', 'b', 'e.txt', 'f'], self.index.listdir('/a'))
+        self.assertEqual(['h.txt'], self.index.listdir('/a/f/g'))
+        self.assertIsNone(self.index.listdir('/a/e.txt'))
+        self.assertIsNone(self.index.listdir('/z'))
+        self.assertTrue(self.index.isdir('/a/f'))
+        self.assertFalse(self.index.isdir('/a/b/c.txt'))
+
+    def test_walk(self):
+        """Walk directory trees top-down."""
+        self.assertEqual([
+            ('/a', ['b', 'f'], ['.hidden.txt', 'e.txt']),
+            ('/a/b', [], ['c.txt', 'd.py']),
+            ('/a/f', ['g'], []),
+            ('/a/f/g', [], ['h.txt']),
+        ], list(self.index.walk('/a')))
+        self.assertEqual([], list(self.index.walk('/z')))
+
+    def test_glob(self):
+        """Match glob patterns component by component."""
+        self.assertEqual(['/a/b/c.txt', '/a/b/d.py'], self.index.glob('/a/b/*'))
+        self.assertEqual(['/a/e.txt'], self.index.glob('/a/*.txt'))
+        self.assertEqual(['/a/.hidden.txt'], self.index.glob('/a/.*'))
+        self.assertEqual(['/a/b/c.txt', '/a/b/d.py'], self.index.glob('/a/?/[cd].*'))
+        self.assertEqual(['/a/b/d.py'], self.index.glob('/a/b/d.py'))
+        self.assertEqual([], self.index.glob('/a/b/x.py'))
+        self.assertEqual(
+            ['/a/b/c.txt', '/a/e.txt', '/a/f/g/h.txt'], self.index.glob('/a/**/*.txt'))
+        self.assertEqual(
+            ['/a/f/g', '/a/f/g/h.txt'], self.index.glob('/a/f/**'))
+
+    def test_remove(self):
+        """Removing paths removes directories left empty."""
+        self.index.remove('/a/f/g/h.txt')
+        self.assertFalse(self.index.isdir('/a/f'))
+        self.assertEqual(['.hidden.txt', 'b', 'e.txt'], self.index.listdir('/a'))
+
+        self.index.remove('/a/b/c.txt')
+        self.assertEqual(['d.py'], self.index.listdir('/a/b'))
+
+        self.index.remove('/a/b')
+        self.assertEqual(['d.py'], self.index.listdir('/a/b'))
@@ -0,0 +1,255 @@
+"""Test cases for snapshots of a MockOpen's files (the journal module)."""
+
+import unittest
+from mock_open.mocks import MockOpen, FileLikeMock, Change
+from mock_open.journal import Journal
+
+from unittest.mock import Mock
+
+
+class TestJournal(unittest.TestCase):
+    """Test the stack of epochs behind snapshots."""
+    def test_first_change_wins(self):
+        """Only the state before the first change in an epoch is kept."""
+        journal = Journal()
+        self.assertIsNone(journal.epoch)
+        journal.save_entry('key', 'ignored')
+
+        snapshot = journal.snapshot()
+        journal.save_entry('key', 'first')
+        journal.save_entry('key', 'second')
+        self.assertEqual(({'key': 'first'}, []), journal.rollback(snapshot))
+        self.assertEqual(({}, []), journal.rollback(snapshot))
+
+    def test_invalid_snapshots(self):
+        """Snapshots taken after a restored one, or released, are invalid."""
+        journal = Journal()
+        first = journal.snapshot()
+        second = journal.snapshot()
+        journal.rollback(first)
+        self.assertRaises(ValueError, journal.rollback, second)
+        self.assertRaises(ValueError, Journal().rollback, first)
+
+        journal.release(first)
+        self.assertIsNone(journal.epoch)
+        self.assertRaises(ValueError, journal.release, first)
+
+    def test_release_merges(self):
+        """Releasing a snapshot keeps its changes for the snapshots before."""
+        journal = Journal()
+        first = journal.snapshot()
+        journal.save_entry('a', 1)
+        second = journal.snapshot()
+        journal.save_entry('a', 2)
+        journal.save_entry('b', 3)
+        journal.release(second)
+        self.assertEqual(({'a': 1, 'b': 3}, []), journal.rollback(first))
+
+
+class TestSnapshots(unittest.TestCase):
+    """Test snapshots and restores of a MockOpen's files."""
+    def setUp(self):
+        self.mock_open = MockOpen()
+        self.mock_open['/data/kept'].read_data = 'kept'
+        self.mock_open['/data/written'].read_data = 'before'
+
+    def test_restore_contents(self):
+        """Files written after a snapshot get their contents back."""
+        snapshot = self.mock_open.snapshot()
+        with self.mock_open('/data/written', 'r+') as handle:
+            handle.write('AFTER!')
+            handle.write(' and more')
+        self.mock_open.write_file('/data/kept', 'replaced')
+        self.mock_open['/data/kept'].read_data = 'set'
+
+        self.mock_open.restore(snapshot)
+        self.assertEqual('before', self.mock_open.read_file('/data/written'))
+        self.assertEqual('kept', self.mock_open.read_file('/data/kept'))
+        with self.mock_open('/data/written') as handle:
+            self.assertEqual('before', handle.read())
+
+    def test_restore_paths(self):
+        """Files created, removed or renamed after a snapshot are restored."""
+        snapshot = self.mock_open.snapshot()
+        with self.mock_open('/data/new/created', 'w') as handle:
+            handle.write('new')
+        self.mock_open.remove('/data/kept')
+        self.mock_open.rename('/data/written', '/other/moved')
+        self.assertEqual(['new'], self.mock_open.listdir('/data'))
+
+        self.mock_open.restore(snapshot)
+        self.assertEqual(['kept', 'written'], self.mock_open.listdir('/data'))
+        self.assertFalse(self.mock_open.exists('/data/new/created'))
+        self.assertFalse(self.mock_open.isdir('/other'))
+        self.assertEqual('before', self.mock_open.read_file('/data/written'))
+
+    def test_restore_repeatedly(self):
+        """A snapshot may be restored after each of several changes."""
+        snapshot = self.mock_open.snapshot()
+        for text in ('one', 'two', 'three'):
+            self.mock_open.write_file('/data/written', text)
+            self.mock_open.write_file('/data/' + text, text)
+            self.mock_open.restore(snapshot)
+            self.assertEqual('before', self.mock_open.read_file('/data/written'))
+            self.assertEqual(['kept', 'written'], self.mock_open.listdir('/data'))
+
+    def test_nested_snapshots(self):
+        """Restoring an earlier snapshot discards the later ones."""
+        first = self.mock_open.snapshot()
+        self.mock_open.write_file('/data/written', 'first')
+        second = self.mock_open.snapshot()
+        self.mock_open.write_file('/data/written', 'second')
+        self.mock_open.write_file('/data/kept', 'second')
+
+        self.mock_open.restore(second)
+        self.assertEqual('first', self.mock_open.read_file('/data/written'))
+        self.assertEqual('kept', self.mock_open.read_file('/data/kept'))
+        self.mock_open.write_file('/data/kept', 'again')
+
+        self.mock_open.restore(first)
+        self.assertEqual('before', self.mock_open.read_file('/data/written'))
+        self.assertEqual('kept', self.mock_open.read_file('/data/kept'))
+        self.assertRaises(ValueError, self.mock_open.restore, second)
+
+    def test_release(self):
+        """Released snapshots can't be restored, the changes are kept."""
+        first = self.mock_open.snapshot()
+        second = self.mock_open.snapshot()
+        self.mock_open.write_file('/data/written', 'after')
+        self.mock_open.release(second)
+        self.assertRaises(ValueError, self.mock_open.restore, second)
+        self.assertEqual('after', self.mock_open.read_file('/data/written'))
+        self.mock_open.restore(first)
+        self.assertEqual('before', self.mock_open.read_file('/data/written'))
+
+    def test_reset_invalidates(self):
+        """Resetting the mock invalidates its snapshots."""
+        snapshot = self.mock_open.snapshot()
+        self.mock_open.reset_mock()
+        self.assertRaises(ValueError, self.mock_open.restore, snapshot)
+
+    def test_reset_reused_files(self):
+        """Files reused after resetting the mock are journaled."""
+        self.mock_open('/data/kept').close()
+        self.mock_open.reset_mock()
+        self.mock_open('/data/kept', 'w').close()
+        snapshot = self.mock_open.snapshot()
+        self.mock_open.write_file('/data/kept', 'y')
+        self.mock_open.restore(snapshot)
+        self.assertEqual('', self.mock_open('/data/kept').read())
+
+    def test_assigned_files(self):
+        """Files assigned after a snapshot are journaled as well."""
+        snapshot = self.mock_open.snapshot()
+        child = FileLikeMock(read_data='assigned')
+        self.mock_open['/data/kept'] = child
+        child.write('!')
+        self.mock_open.restore(snapshot)
+        self.assertEqual('kept', self.mock_open.read_file('/data/kept'))
+
+    def test_lazy_files(self):
+        """Lazy files aren't loaded by snapshots, nor by restores."""
+        load = Mock(return_value='lazy')
+        self.mock_open.add_lazy_file('/lazy/file', load)
+        snapshot = self.mock_open.snapshot()
+        self.mock_open.remove('/lazy/file')
+        self.mock_open.restore(snapshot)
+        self.assertTrue(self.mock_open.isfile('/lazy/file'))
+        load.assert_not_called()
+        self.assertEqual('lazy', self.mock_open.read_file('/lazy/file'))
+
+
+class TestDiff(unittest.TestCase):
+    """Test diffs of a MockOpen's files since a snapshot."""
+    def setUp(self):
+        self.mock_open = MockOpen()
+        self.mock_open['/data/binary'].read_data = b'0123456789'
+        self.mock_open['/data/text'].read_data = 'text'
+        self.snapshot = self.mock_open.snapshot()
+
+    def test_no_changes(self):
+        """Reading files doesn't change them."""
+        with self.mock_open('/data/binary', 'rb') as handle:
+            handle.read()
+        self.assertEqual([], self.mock_open.diff(self.snapshot))
+
+    def test_written_ranges(self):
+        """Ranges written in place are merged, and appends grow the file."""
+        with self.mock_open('/data/binary', 'r+b') as handle:
+            handle.seek(2)
+            handle.write(b'ab')
+            handle.write(b'cd')
+            handle.seek(3)
+            handle.write(b'X')
+            handle.seek(8)
+            handle.writelines([b'YY', b'ZZ'])
+        with self.mock_open('/data/text', 'a') as handle:
+            handle.seek(0, 2)
+            handle.write(' more')
+
+        self.assertEqual([
+            Change('/data/binary', 'modified', [(2, 4), (8, 4)], 10, 12),
+            Change('/data/text', 'modified', [(4, 5)], 4, 9),
+        ], self.mock_open.diff(self.snapshot))
+
+    def test_truncated(self):
+        """Truncated files are smaller, the truncated range is changed when regrown."""
+        self.mock_open['/data/binary']._truncate(4)
+        self.assertEqual(
+            [Change('/data/binary', 'modified', [], 10, 4)],
+            self.mock_open.diff(self.snapshot))
+
+        with self.mock_open('/data/binary', 'ab') as handle:
+            handle.seek(0, 2)
+            handle.write(b'ab')
+        self.assertEqual(
+            [Change('/data/binary', 'modified', [(4, 2)], 10, 6)],
+            self.mock_open.diff(self.snapshot))
+
+    def test_paths(self):
+        """Created, removed, replaced and renamed files."""
+        self.mock_open.write_file('/data/new', 'new')
+        self.mock_open.remove('/data/text')
+        self.mock_open.rename('/data/binary', '/moved')
+        self.mock_open['/data/assigned'] = FileLikeMock(read_data='assigned')
+        self.mock_open.write_file('/data/assigned', 'replaced')
+        self.mock_open.write_file('/data/transient', 'transient')
+        self.mock_open.remove('/data/transient')
+
+        self.assertEqual([
+            Change('/data/assigned', 'created', [(0, 8)], None, 8),
+            Change('/data/binary', 'removed', [], 10, None),
+            Change('/data/new', 'created', [(0, 3)], None, 3),
+            Change('/data/text', 'removed', [], 4, None),
+            Change('/moved', 'created', [(0, 10)], None, 10),
+        ], self.mock_open.diff(self.snapshot))
+
+    def test_nested_snapshots(self):
+        """Diffs include the changes made since later snapshots."""
+        self.mock_open.write_file('/data/text', 'first')
+        later = self.mock_open.snapshot()
+        self.mock_open.write_file('/data/text', 'second!')
+        self.assertEqual(
+            [Change('/data/text', 'modified', [(0, 7)], 4, 7)],
+            self.mock_open.diff(self.snapshot))
+        self.assertEqual(
+            [Change('/data/text', 'modified', [(0, 7)], 5, 7)],
+            self.mock_open.diff(later))
+
+        self.mock_open.restore(later)
+        self.assertEqual([], self.mock_open.diff(later))
+        self.assertRaises(ValueError, self.mock_open.diff, MockOpen().snapshot())
+
+    def test_assigned_files(self):
+        """Files registered under another name are found as well."""
+        child = FileLikeMock(read_data='assigned')
+        self.mock_open['/data/assigned'] = child
+        snapshot = self.mock_open.snapshot()
+        child.write('A')
+        self.assertEqual(
+            [Change('/data/assigned', 'modified', [(0, 1)], 8, 8)],
+            self.mock_open.diff(snapshot))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,20 +1,23 @@
 """Test cases for the mocks module."""
 
+import gc
+import os
+import shutil
 import sys
+import tarfile
+import tempfile
+import threading
+import time
 import unittest
+import warnings
 from functools import wraps
+from io import BytesIO, TextIOWrapper
 from mock_open.mocks import MockOpen, FileLikeMock
+from mock_open.patchers import patch_os
 
-try:
-    # pylint: disable=no-name-in-module
-    from unittest.mock import patch, call, NonCallableMock, DEFAULT
-except ImportError:
-    from mock import patch, call, NonCallableMock, DEFAULT
+from unittest.mock import patch, call, Mock, NonCallableMock, DEFAULT
 
-if sys.version_info < (3, 0):
-    OPEN = '__builtin__.open'
-else:
-    OPEN = 'builtins.open'
+OPEN = 'builtins.open'
 
 
 @patch(OPEN, new_callable=MockOpen)
@@ -195,6 +198,18 @@ class TestOpenSingleFiles(unittest.TestCase):
 
         self.assertEqual(contents, handle.read_data.splitlines())
 
+    def test_truncate(self, mock_open):
+        """Truncate the file at the current position or at a given size."""
+        mock_open.return_value.read_data = 'Some data to truncate'
+        with open('/path/to/file', 'r+') as handle:
+            handle.seek(12)
+            self.assertEqual(12, handle.truncate())
+            self.assertEqual(4, handle.truncate(4))
+            self.assertEqual(12, handle.tell())
+
+        handle.truncate.assert_has_calls([call(), call(4)])
+        self.assertEqual('Some', handle.read_data)
+
     def test_iteration(self, mock_open):
         """Test iterating over the file handle."""
         contents = [
@@ -217,6 +232,17 @@ class TestOpenSingleFiles(unittest.TestCase):
             with self.assertRaises(StopIteration):
                 next(handle)
 
+    def test_iteration_records_readline(self, mock_open):
+        """Iterating over the file (either way) goes through `readline`."""
+        mock_open.return_value.read_data = 'first\nsecond\nthird\n'
+        with open('/path/to/file') as handle:
+            self.assertEqual('first\n', next(handle))
+            self.assertEqual(['second\n', 'third\n'], list(handle))
+            self.assertEqual([], list(handle))
+
+        # Three lines and two calls hitting the end of the file.
+        self.assertEqual(5, handle.readline.call_count)
+
     def test_getitem_after_call(self, mock_open):
         """Retrieving a handle after the call to open() should give us the same
         object.
@@ -321,9 +347,8 @@ class TestMultipleCalls(unittest.TestCase):
             self.assertEqual(9, third_handle.tell())
 
         # Same thing, but not as a context manager.
-        # TODO: In this case we differ from `open` implementation since all of these handles
-        # are actually the same `FileLikeMock` instance. A better mock would provide multiple
-        # instances.
+        # In this case we differ from `open` implementation since all of these handles are
+        # actually the same `FileLikeMock` instance (see `test_independent_handles`).
         first_handle = open('/some/file')
         self.assertEqual(0, first_handle.tell())
         self.assertEqual('SOME', first_handle.read(4))
@@ -339,6 +364,149 @@ class TestMultipleCalls(unittest.TestCase):
         self.assertNotEqual(0, second_handle.tell()) # FIXME?
 
 
+    def test_independent_handles(self, _):
+        """Each call to open() gets its own position and mode."""
+        mock_open = MockOpen(read_data='SOME DATA', independent_handles=True)
+        with patch(OPEN, mock_open):
+            first_handle = open('/some/file')
+            self.assertEqual('SOME', first_handle.read(4))
+            self.assertEqual(4, first_handle.tell())
+
+            second_handle = open('/some/file', 'rb')
+            self.assertEqual(0, second_handle.tell())
+            self.assertEqual(4, first_handle.tell())
+            self.assertEqual(b'SOME DATA', second_handle.read())
+
+            third_handle = open('/some/file', 'a')
+            self.assertEqual(9, third_handle.tell())
+            third_handle.write('!')
+
+            self.assertEqual(' DATA!', first_handle.read())
+            self.assertEqual(b'!', second_handle.read())
+
+            third_handle.close()
+            self.assertTrue(third_handle.closed)
+            self.assertFalse(first_handle.closed)
+            self.assertRaises(ValueError, third_handle.read)
+
+        # All calls are recorded by the path's shared mock.
+        self.assertIs(mock_open['/some/file'], first_handle.file)
+        self.assertIs(first_handle.file, second_handle.file)
+        self.assertEqual(
+            [call(4), call(), call(), call(), ],
+            mock_open['/some/file'].read.mock_calls)
+        mock_open['/some/file'].close.assert_called_once_with()
+
+    def test_independent_append_handles(self, _):
+        """Appending handles write at the end of the file, not at their position."""
+        mock_open = MockOpen(read_data='log\n', independent_handles=True)
+        first_handle = mock_open('/some/file', 'a')
+        second_handle = mock_open('/some/file', 'a')
+        first_handle.write('A\n')
+        second_handle.write('B\n')
+        second_handle.seek(0)
+        second_handle.writelines(['C\n', 'D\n'])
+        self.assertEqual('log\nA\nB\nC\nD\n', mock_open['/some/file'].read_data)
+        self.assertEqual(12, second_handle.tell())
+
+    def test_independent_handles_context_manager(self, _):
+        """Independent handles work as context managers and iterators."""
+        mock_open = MockOpen(read_data='first\nsecond\n', independent_handles=True)
+        with patch(OPEN, mock_open):
+            with open('/some/file') as first_handle:
+                self.assertEqual('first\n', next(first_handle))
+                with open('/some/file') as second_handle:
+                    self.assertEqual(['first\n', 'second\n'], list(second_handle))
+                self.assertEqual(['second\n'], list(first_handle))
+
+        self.assertTrue(first_handle.closed)
+        self.assertTrue(second_handle.closed)
+        mock_open.assert_has_calls([
+            call('/some/file'),
+            call().__enter__(),
+            call().readline(),
+        ])
+
+    def test_concurrent_readers(self, _):
+        """Independent handles may be read from multiple threads at once."""
+        contents = ''.join('line %d\n' % (i, ) for i in range(1000))
+        mock_open = MockOpen(read_data=contents, independent_handles=True)
+
+        results = []
+        def reader():
+            # pylint: disable=missing-docstring
+            with mock_open('/some/file', 'r') as handle:
+                results.append(''.join(handle))
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([contents, ] * 8, results)
+
+    def test_concurrent_enter(self, _):
+        """Entering a handle doesn't move other handles reading the file."""
+        contents = ''.join('line %d\n' % (i, ) for i in range(1000))
+        mock_open = MockOpen(read_data=contents, independent_handles=True)
+
+        done = threading.Event()
+        def enter():
+            # pylint: disable=missing-docstring
+            while not done.is_set():
+                with mock_open('/some/file'):
+                    pass
+
+        # Switch threads often to interleave entering with reading lines.
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=enter)
+        thread.start()
+        try:
+            results = []
+            for _ in range(20):
+                with mock_open('/some/file') as handle:
+                    results.append(''.join(handle))
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual([contents, ] * 20, results)
+
+    def test_concurrent_getsize(self, _):
+        """Sizing a file doesn't move handles reading it."""
+        contents = ''.join('line %d\n' % (i, ) for i in range(1000))
+        mock_open = MockOpen(read_data=contents[:-9], independent_handles=True)
+        # Written contents are sized by seeking to their end.
+        with mock_open('/some/file', 'a') as handle:
+            handle.write(contents[-9:])
+
+        done = threading.Event()
+        def getsize():
+            # pylint: disable=missing-docstring
+            while not done.is_set():
+                mock_open.getsize('/some/file')
+
+        # Switch threads often to interleave sizing with reading lines.
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=getsize)
+        thread.start()
+        try:
+            results = []
+            for _ in range(20):
+                with mock_open('/some/file') as handle:
+                    results.append(''.join(handle))
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual([contents, ] * 20, results)
+
+
 @patch(OPEN, new_callable=MockOpen)
 class TestSideEffects(unittest.TestCase):
     """Test setting the side_effect attribute in various situations."""
@@ -518,6 +686,357 @@ class TestAPI(unittest.TestCase):
             with open('/path/to/other/file', 'r') as handle:
                 self.assertEqual('Global', handle.read())
 
+    def test_file_spec(self):
+        """File mocks are specced after `TextIOWrapper`."""
+        mock_open = MockOpen()
+        first_handle = mock_open('/path/to/first_file')
+        second_handle = mock_open('/path/to/second_file')
+
+        for handle in (first_handle, second_handle):
+            self.assertIsInstance(handle, TextIOWrapper)
+            with self.assertRaises(AttributeError):
+                handle.no_such_method()
+
+    def test_methods_wired_before_contents_set(self):
+        """File methods accessed before the contents are set read them."""
+        mock_open = MockOpen()
+        handle = mock_open['/path/to/file']
+        read = handle.read
+
+        handle.read_data = 'Late contents'
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual('Late contents', handle.read())
+
+        self.assertIs(read, handle.read)
+        read.assert_called_once_with()
+
+
+class TestBulkLoading(unittest.TestCase):
+    """Test creating mocks with many files up front."""
+    def test_lazy_file(self):
+        """Lazy files are only loaded when first used."""
+        mock_open = MockOpen()
+        load = Mock(return_value='Lazy contents')
+        mock_open.add_lazy_file('/path/to/file', load)
+        load.assert_not_called()
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual('Lazy contents', handle.read())
+
+            with open('/path/to/file', 'r') as second_handle:
+                self.assertIs(handle, second_handle)
+
+        load.assert_called_once_with()
+        mock_open.assert_has_calls([
+            call('/path/to/file', 'r'),
+            call().__enter__(),
+            call().read(),
+        ])
+
+    def test_from_mapping(self):
+        """Create files from a mapping of paths to contents."""
+        mock_open = MockOpen.from_mapping({
+            '/path/to/text': 'Some text',
+            '/path/to/binary': b'Some bytes',
+        }, read_data='Default contents')
+
+        self.assertEqual(b'Some bytes', mock_open['/path/to/binary'].read_data)
+        with patch(OPEN, mock_open):
+            with open('/path/to/text', 'r') as handle:
+                self.assertEqual('Some text', handle.read())
+
+            with open('/path/to/other', 'r') as handle:
+                self.assertEqual('Default contents', handle.read())
+
+    def test_from_directory(self):
+        """Create files from a real directory's files."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        os.mkdir(os.path.join(root, 'subdirectory'))
+        for (path, contents) in (('first', b'First file'),
+                                 (os.path.join('subdirectory', 'second'), b'Second file')):
+            with open(os.path.join(root, path), 'wb') as real_file:
+                real_file.write(contents)
+
+        for mapped in (False, True):
+            mock_open = MockOpen.from_directory(root, '/mnt', mapped=mapped)
+            with patch(OPEN, mock_open):
+                with open('/mnt/first', 'r') as handle:
+                    self.assertEqual('First file', handle.read())
+
+                with open(os.path.join('/mnt', 'subdirectory', 'second'), 'rb') as handle:
+                    self.assertEqual(b'Second file', handle.read())
+
+        mock_open = MockOpen.from_directory(root)
+        self.assertEqual(b'First file', mock_open[os.path.join(root, 'first')].read_data)
+
+    def test_from_directory_sizes(self):
+        """Sizes of files from a real directory are known without reading them."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, 'first'), 'wb') as real_file:
+            real_file.write(b'First file')
+
+        mock_open = MockOpen.from_directory(root, '/mnt')
+        with patch('mock_open.mocks._read_real_file') as read_real_file:
+            self.assertEqual(10, mock_open.getsize('/mnt/first'))
+            self.assertEqual(10, mock_open.stat('/mnt/first').st_size)
+        read_real_file.assert_not_called()
+        self.assertEqual(b'First file', mock_open['/mnt/first'].read_data)
+
+        # Sizing the real files isn't affected by patching `os`.
+        for (mount_point, path) in (('/mnt', '/mnt/first'), (None, os.path.join(root, 'first'))):
+            mock_open = MockOpen.from_directory(root, mount_point)
+            with patch_os(mock_open):
+                self.assertEqual(10, os.path.getsize(path))
+                self.assertEqual(10, os.stat(path).st_size)
+
+    def test_from_tar(self):
+        """Create files from a tar archive's members."""
+        archive = BytesIO()
+        with tarfile.open(fileobj=archive, mode='w') as tar:
+            for (path, contents) in (('first', b'First file'), ('dir/second', b'Second file')):
+                info = tarfile.TarInfo(path)
+                info.size = len(contents)
+                tar.addfile(info, BytesIO(contents))
+        archive.seek(0)
+
+        mock_open = MockOpen.from_tar(archive, '/mnt')
+        with patch(OPEN, mock_open):
+            with open('/mnt/dir/second', 'r') as handle:
+                self.assertEqual('Second file', handle.read())
+
+        self.assertEqual(b'First file', mock_open['/mnt/first'].read_data)
+
+    def test_from_tar_path(self):
+        """Archives opened by path are closed by `close()`."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, 'archive.tar')
+        with tarfile.open(path, mode='w') as tar:
+            for (name, contents) in (('first', b'First file'), ('second', b'Second file')):
+                info = tarfile.TarInfo(name)
+                info.size = len(contents)
+                tar.addfile(info, BytesIO(contents))
+
+        mock_open = MockOpen.from_tar(path)
+        self.assertEqual(b'First file', mock_open[os.path.abspath('first')].read_data)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            mock_open.close()
+            del mock_open
+            gc.collect()
+        self.assertEqual([], [warning for warning in caught
+                              if issubclass(warning.category, ResourceWarning)])
+
+
+class TestReadData(unittest.TestCase):
+    """Test accessing the file's contents directly."""
+    @patch(OPEN, new_callable=MockOpen)
+    def test_read_data_cached(self, mock_open):
+        """Contents aren't copied again until the file is written to."""
+        mock_open['/path/to/file'].read_data = 'Some text'
+
+        with open('/path/to/file', 'r+') as handle:
+            first = handle.read_data
+            self.assertIs(first, handle.read_data)
+
+            handle.write('More text')
+            self.assertEqual('More text', handle.read_data)
+            self.assertIsNot(first, handle.read_data)
+
+    @patch(OPEN, new_callable=MockOpen)
+    def test_read_buffer(self, mock_open):
+        """Access binary contents through a `memoryview`."""
+        mock_open['/path/to/file'].read_data = b'Some bytes'
+
+        with open('/path/to/file', 'rb') as handle:
+            buffer = handle.read_buffer
+            self.assertIsInstance(buffer, memoryview)
+            self.assertTrue(buffer.readonly)
+            self.assertEqual(b'Some', buffer[:4])
+
+        with open('/path/to/file', 'r') as handle:
+            self.assertEqual('Some bytes', handle.read_buffer)
+
+
+class TestRecording(unittest.TestCase):
+    """Test the recording policies of file mocks' data methods."""
+    CONTENTS = ''.join('line %d\n' % (i, ) for i in range(10))
+
+    def _read_lines(self, mock_open):
+        # pylint: disable=missing-docstring
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                for _ in range(10):
+                    handle.readline()
+
+        return mock_open['/path/to/file']
+
+    def test_record_all(self):
+        """By default every call is recorded."""
+        mock_open = MockOpen(read_data=self.CONTENTS)
+        handle = self._read_lines(mock_open)
+
+        self.assertEqual(10, handle.readline.call_count)
+        self.assertEqual([call(), ] * 10, handle.readline.mock_calls)
+        self.assertEqual(10, mock_open.mock_calls.count(call().readline()))
+
+    def test_record_first(self):
+        """Only record the first N calls."""
+        mock_open = MockOpen(read_data=self.CONTENTS, recording='first', recording_limit=3)
+        handle = self._read_lines(mock_open)
+
+        self.assertEqual(10, handle.readline.call_count)
+        self.assertEqual([call(), ] * 3, handle.readline.call_args_list)
+        self.assertEqual([call(), ] * 3, handle.readline.mock_calls)
+        self.assertNotIn(call().readline(), mock_open.mock_calls)
+
+    def test_record_last(self):
+        """Only record the last N calls."""
+        mock_open = MockOpen(read_data=self.CONTENTS, recording='last', recording_limit=2)
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                handle.read(1)
+                handle.read(2)
+                handle.read(3)
+
+        self.assertEqual(3, handle.read.call_count)
+        self.assertEqual([call(2), call(3), ], handle.read.call_args_list)
+        handle.read.assert_called_with(3)
+        handle.read.assert_has_calls([call(2), call(3), ])
+
+    def test_record_count(self):
+        """Keep call counts and the last call only."""
+        mock_open = MockOpen(read_data=self.CONTENTS, recording='count')
+        handle = self._read_lines(mock_open)
+
+        self.assertEqual(10, handle.readline.call_count)
+        handle.readline.assert_called_with()
+        self.assertEqual([], handle.readline.mock_calls)
+        self.assertEqual([], handle.readline.call_args_list)
+
+    def test_record_none(self):
+        """Don't record calls at all, but keep functioning."""
+        mock_open = MockOpen(read_data=self.CONTENTS, recording='none')
+        handle = self._read_lines(mock_open)
+
+        handle.readline.assert_not_called()
+        self.assertEqual('', handle.readline())
+
+        # Methods other than the data ones are still recorded.
+        handle.close.assert_called_once_with()
+        mock_open.assert_called_once_with('/path/to/file', 'r')
+
+    def test_per_file_policy(self):
+        """The policy can be set for specific files."""
+        mock_open = MockOpen(read_data=self.CONTENTS)
+        mock_open['/path/to/file'].recording = 'none'
+        handle = self._read_lines(mock_open)
+
+        handle.readline.assert_not_called()
+
+    def test_invalid_policy(self):
+        """Unknown policies or missing limits raise a `ValueError`."""
+        self.assertRaises(ValueError, MockOpen, recording='some')
+        self.assertRaises(ValueError, MockOpen, recording='first')
+        self.assertRaises(ValueError, FileLikeMock, recording='last')
+
+    def test_invalid_file_policy(self):
+        """Setting an invalid policy on a file raises a `ValueError`."""
+        mock_open = MockOpen(read_data=self.CONTENTS)
+        child = mock_open['/path/to/file']
+        with self.assertRaises(ValueError):
+            child.recording = 'bogus'
+        with self.assertRaises(ValueError):
+            child.recording = 'last'
+        self.assertEqual('all', child.recording)
+
+        child.recording_limit = 2
+        child.recording = 'last'
+        with self.assertRaises(ValueError):
+            child.recording_limit = None
+        self.assertEqual(('last', 2), (child.recording, child.recording_limit))
+
+
+class TestThreads(unittest.TestCase):
+    """Test calling open() from multiple threads at once."""
+    THREADS = 16
+    ITERATIONS = 200
+
+    def test_concurrent_opens(self):
+        """Each thread gets its file's contents and side effects."""
+        mock_open = MockOpen(read_data='Default')
+        for i in range(self.THREADS):
+            if i % 2:
+                mock_open['/path/to/file_%d' % (i, )].side_effect = IOError()
+            else:
+                mock_open['/path/to/file_%d' % (i, )].read_data = 'File %d' % (i, )
+
+        errors = []
+        def worker(i):
+            # pylint: disable=missing-docstring
+            path = '/path/to/file_%d' % (i, )
+            new_path = '/path/to/new_file_%d' % (i, )
+            for j in range(self.ITERATIONS):
+                try:
+                    handle = mock_open(path, 'r')
+                except IOError:
+                    if not i % 2:
+                        errors.append((path, 'unexpected error'))
+                else:
+                    if i % 2:
+                        errors.append((path, 'missing error'))
+                    elif handle.name != path:
+                        errors.append((path, handle.name))
+
+                handle = mock_open('%s_%d' % (new_path, j), 'r')
+                if handle.name != '%s_%d' % (new_path, j):
+                    errors.append((new_path, handle.name))
+                elif handle.read_data != 'Default':
+                    errors.append((new_path, handle.read_data))
+
+        threads = [threading.Thread(target=worker, args=(i, )) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(2 * self.THREADS * self.ITERATIONS, mock_open.call_count)
+        for i in range(self.THREADS):
+            for j in range(self.ITERATIONS):
+                self.assertEqual('Default', mock_open['/path/to/new_file_%d_%d' % (i, j)].read_data)
+
+    def test_concurrent_new_paths(self):
+        """Opening new paths at once on a fresh mock gives each its own file."""
+        set_properties = FileLikeMock.set_properties
+        def slow_set_properties(child, path, mode):
+            # pylint: disable=missing-docstring
+            time.sleep(0.001)
+            set_properties(child, path, mode)
+
+        with patch.object(FileLikeMock, 'set_properties', slow_set_properties):
+            for _ in range(20):
+                mock_open = MockOpen()
+                barrier = threading.Barrier(2)
+                def worker(path):
+                    # pylint: disable=missing-docstring,cell-var-from-loop
+                    barrier.wait()
+                    mock_open(path)
+
+                threads = [threading.Thread(target=worker, args=(path, )) for path in ('/0', '/1')]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                self.assertIsNot(mock_open['/0'], mock_open['/1'])
+                self.assertEqual('/0', mock_open['/0'].name)
+                self.assertEqual('/1', mock_open['/1'].name)
+
 
 class TestModes(unittest.TestCase):
     """Test different modes behavior."""
@@ -594,6 +1113,201 @@ class TestModes(unittest.TestCase):
         self.assertIsInstance(contents, str)
         self.assertEqual('Textual content', contents)
 
+    @patch(OPEN, new_callable=MockOpen)
+    def test_switching_modes_keeps_contents(self, mock_open):
+        """Switching between text and binary doesn't convert the contents."""
+        mock_open['/path/to/file'].read_data = u'Caf\xe9\nau lait\n'
+
+        with open('/path/to/file', 'rb') as handle:
+            binary = handle.read_data
+            self.assertEqual(b'Caf\xc3\xa9\nau lait\n', handle.read())
+
+        with open('/path/to/file', 'r') as handle:
+            text = handle.read_data
+            self.assertEqual([u'Caf\xe9\n', 'au lait\n'], list(handle))
+
+        with open('/path/to/file', 'rb') as handle:
+            self.assertIs(binary, handle.read_data)
+
+        with open('/path/to/file', 'r') as handle:
+            self.assertIs(text, handle.read_data)
+
+    @patch(OPEN, new_callable=MockOpen)
+    def test_write_binary_read_text(self, _):
+        """Binary writes are visible when reading as text and vice versa."""
+        with open('/path/to/file', 'wb') as handle:
+            handle.write(b'Caf\xc3\xa9')
+
+        with open('/path/to/file', 'a') as handle:
+            handle.write(u' cr\xe8me')
+
+        with open('/path/to/file', 'r') as handle:
+            self.assertEqual(u'Caf\xe9 cr\xe8me', handle.read())
+
+        with open('/path/to/file', 'rb') as handle:
+            self.assertEqual(b'Caf\xc3\xa9 cr\xc3\xa8me', handle.read())
+
+
+class TestPaths(unittest.TestCase):
+    """Test resolving the paths files are registered by."""
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        os.rmdir(self.directory)
+
+    def test_equivalent_paths(self):
+        """Equivalent paths refer to the same file, keeping their own names."""
+        mock_open = MockOpen()
+        mock_open['b'].read_data = 'Some data'
+        path = os.path.join(os.getcwd(), 'b')
+
+        with patch(OPEN, mock_open):
+            for name in ['b', './a/../b', path, path.encode('utf8'), os.path.join('.', 'b')]:
+                with open(name, 'r') as handle:
+                    self.assertEqual(name, handle.name)
+                    self.assertEqual('Some data', handle.read())
+
+        self.assertIs(mock_open['b'], mock_open[path])
+        self.assertEqual(path, mock_open.canonical_path('./a/../b'))
+
+    def test_path_like(self):
+        """Path-like objects are resolved as their paths."""
+        import pathlib
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = 'Some data'
+
+        with patch(OPEN, mock_open):
+            with open(pathlib.Path('/path/to/file'), 'r') as handle:
+                self.assertEqual('Some data', handle.read())
+
+    def test_current_directory(self):
+        """Relative paths are resolved against the current directory."""
+        mock_open = MockOpen()
+        mock_open['file'].read_data = 'Before'
+        os.chdir(self.cwd)
+        mock_open['file'].read_data = 'After'
+
+        os.chdir(self.directory)
+        self.assertEqual('Before', mock_open['file'].read_data)
+        self.assertEqual('After', mock_open[os.path.join(self.cwd, 'file')].read_data)
+
+    def test_case_insensitive(self):
+        """Optionally ignore case differences."""
+        mock_open = MockOpen(case_sensitive=False)
+        mock_open['/Path/To/File'].read_data = 'Some data'
+        self.assertEqual('Some data', mock_open['/path/to/FILE'].read_data)
+
+        mock_open = MockOpen()
+        mock_open['/Path/To/File'].read_data = 'Some data'
+        self.assertEqual('', mock_open['/path/to/FILE'].read_data)
+
+    def test_file_descriptors(self):
+        """Integer file descriptors are files of their own."""
+        mock_open = MockOpen()
+        mock_open[3].read_data = 'Some data'
+
+        with patch(OPEN, mock_open):
+            with open(3, 'r') as handle:
+                self.assertEqual('Some data', handle.read())
+
+    def test_directory_queries(self):
+        """Query the directories of the registered files, including lazy ones."""
+        mock_open = MockOpen.from_mapping({'/data/a.txt': 'a', 'data/b/c.txt': 'c'})
+        mock_open['/data/d.bin'].read_data = b'd'
+        with patch(OPEN, mock_open):
+            open('e.txt', 'w').close()
+
+        self.assertEqual(['a.txt', 'd.bin'], mock_open.listdir('/data'))
+        self.assertEqual(['b'], mock_open.listdir('data'))
+        self.assertEqual(['data', 'e.txt'], mock_open.listdir())
+        self.assertTrue(mock_open.isdir('./data/b'))
+        self.assertEqual(['/data/a.txt'], mock_open.glob('/data/*.txt'))
+        self.assertEqual(
+            [os.path.join(self.directory, 'e.txt')], mock_open.glob('*.txt'))
+        with self.assertRaises(OSError):
+            mock_open.listdir('/missing')
+
+        tree = []
+        for (directory, directories, files) in mock_open.walk(self.directory):
+            tree.append((directory, list(directories), files))
+            if 'data' in directories:
+                directories.remove('data')
+        self.assertEqual([(self.directory, ['data'], ['e.txt'])], tree)
+
+    def test_disabled(self):
+        """Normalization may be turned off."""
+        mock_open = MockOpen(normalize_paths=False)
+        mock_open['./file'].read_data = 'Some data'
+        self.assertEqual('', mock_open['file'].read_data)
+        self.assertEqual('./file', mock_open.canonical_path('./file'))
+
+
+class TestLeaks(unittest.TestCase):
+    """Test detecting handles which were never closed."""
+    def test_leaks(self):
+        """List the handles still open."""
+        mock_open = MockOpen(independent_handles=True)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/closed', 'r'):
+                pass
+            leaked = open('/path/to/leaked', 'r')
+            open('/path/to/closed', 'r').close()
+
+        leaks = mock_open.leaks()
+        self.assertEqual(1, len(leaks))
+        self.assertEqual('/path/to/leaked', leaks[0].path)
+        self.assertIs(leaked, leaks[0].handle)
+        self.assertIsNone(leaks[0].stack)
+
+        with self.assertRaises(AssertionError):
+            mock_open.assert_no_leaks()
+        leaked.close()
+        mock_open.assert_no_leaks()
+
+    def test_stacks(self):
+        """Capture the stack of every n-th call to open()."""
+        mock_open = MockOpen(stack_sampling=2)
+
+        with patch(OPEN, mock_open):
+            handles = []
+            for i in range(4):
+                handles.append(open('/path/to/file_%d' % (i, ), 'r'))
+
+        stacks = [handle.open_stack for handle in handles]
+        self.assertEqual([False, True, False, True], [stack is None for stack in stacks])
+        self.assertEqual('test_stacks', stacks[0][-1][2])
+
+        try:
+            mock_open.assert_no_leaks()
+        except AssertionError as error:
+            message = str(error)
+        self.assertIn('4 file handle(s) left open:', message)
+        self.assertIn("'/path/to/file_2'\n  opened at:", message)
+        self.assertIn('in test_stacks', message)
+
+    def test_leak_check(self):
+        """The context manager only considers handles opened within it."""
+        mock_open = MockOpen()
+
+        with patch(OPEN, mock_open):
+            open('/path/to/before', 'r')
+            with mock_open.leak_check():
+                open('/path/to/inside', 'r').close()
+
+            with self.assertRaises(AssertionError):
+                with mock_open.leak_check():
+                    open('/path/to/inside', 'r')
+
+            with self.assertRaises(IOError):
+                with mock_open.leak_check():
+                    open('/path/to/other', 'r')
+                    raise IOError()
+
 
 class TestIssues(unittest.TestCase):
     """Test cases related to issues on GitHub.
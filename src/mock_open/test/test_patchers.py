@@ -0,0 +1,167 @@
+"""Test cases for the patchers module."""
+
+import errno
+import os
+import stat
+import unittest
+from mock_open.mocks import MockOpen
+from mock_open.patchers import patch_os, patch_pathlib
+
+
+class TestPatchOs(unittest.TestCase):
+    """Test serving `os` functions from a `MockOpen`'s files."""
+    def setUp(self):
+        self.mock_open = MockOpen.from_mapping({
+            '/data/a.txt': 'Some text',
+            '/data/sub/b.bin': b'\x00' * 1000,
+        })
+
+    def test_queries(self):
+        """Query files' existence, types and sizes."""
+        with patch_os(self.mock_open):
+            self.assertTrue(os.path.exists('/data/a.txt'))
+            self.assertTrue(os.path.exists('/data/sub'))
+            self.assertFalse(os.path.exists('/data/missing'))
+            self.assertTrue(os.path.isfile('/data/a.txt'))
+            self.assertFalse(os.path.isfile('/data/sub'))
+            self.assertTrue(os.path.isdir('/data/sub'))
+            self.assertFalse(os.path.isdir('/data/a.txt'))
+            self.assertEqual(9, os.path.getsize('/data/a.txt'))
+            self.assertEqual(1000, os.path.getsize('/data/sub/b.bin'))
+            self.assertEqual(['a.txt', 'sub'], sorted(os.listdir('/data')))
+
+            result = os.stat('/data/sub/b.bin')
+            self.assertTrue(stat.S_ISREG(result.st_mode))
+            self.assertEqual(1000, result.st_size)
+            self.assertTrue(stat.S_ISDIR(os.stat('/data').st_mode))
+
+            with self.assertRaises(OSError) as context:
+                os.stat('/data/missing')
+            self.assertEqual(errno.ENOENT, context.exception.errno)
+            with self.assertRaises(OSError):
+                os.path.getsize('/data/missing')
+
+        self.assertFalse(os.path.exists('/data/a.txt'))
+
+    def test_size_after_writing(self):
+        """Sizes reflect the current contents, in bytes."""
+        with patch_os(self.mock_open):
+            with open('/data/a.txt', 'a') as handle:
+                handle.write(u' é')
+                self.assertEqual(12, os.path.getsize('/data/a.txt'))
+                handle.seek(0)
+                self.assertEqual(12, os.path.getsize('/data/a.txt'))
+            self.assertEqual(u'Some text é', open('/data/a.txt').read())
+
+    def test_remove_and_rename(self):
+        """Remove and rename files and directories."""
+        with patch_os(self.mock_open):
+            os.rename('/data/a.txt', '/data/c.txt')
+            self.assertEqual(['c.txt', 'sub'], sorted(os.listdir('/data')))
+            self.assertEqual('Some text', open('/data/c.txt').read())
+
+            os.rename('/data/sub', '/other')
+            self.assertEqual(['c.txt'], os.listdir('/data'))
+            self.assertEqual(1000, os.path.getsize('/other/b.bin'))
+
+            os.remove('/data/c.txt')
+            self.assertFalse(os.path.exists('/data'))
+            with self.assertRaises(OSError) as context:
+                os.unlink('/data/c.txt')
+            self.assertEqual(errno.ENOENT, context.exception.errno)
+            with self.assertRaises(OSError) as context:
+                os.remove('/other')
+            self.assertEqual(errno.EISDIR, context.exception.errno)
+            with self.assertRaises(OSError):
+                os.rename('/missing', '/data/c.txt')
+
+    def test_decorator(self):
+        """The patcher may decorate functions."""
+        @patch_os(self.mock_open, patch_open=False)
+        def exists():
+            # pylint: disable=missing-docstring
+            return os.path.exists('/data/a.txt')
+
+        self.assertTrue(exists())
+        self.assertFalse(os.path.exists('/data/a.txt'))
+
+
+class TestPatchPathlib(unittest.TestCase):
+    """Test routing `pathlib.Path`'s file methods to a `MockOpen`."""
+    def test_open(self):
+        """Open files through the mock."""
+        import pathlib
+        mock_open = MockOpen()
+
+        with patch_pathlib(mock_open):
+            with pathlib.Path('/path/to/file').open('w') as handle:
+                handle.write('Some text')
+            with pathlib.Path('/path/to/file').open(encoding='utf8') as handle:
+                self.assertEqual('Some text', handle.read())
+
+        mock_open.assert_called_with('/path/to/file', 'r', encoding='utf8')
+        self.assertEqual('Some text', mock_open['/path/to/file'].read_data)
+
+    def test_open_encoding(self):
+        """Files opened with other encodings are converted from/to utf8's bytes."""
+        import pathlib
+        mock_open = MockOpen()
+
+        with patch_pathlib(mock_open):
+            path = pathlib.Path('/path/to/latin')
+            path.write_text('\xe9', encoding='latin-1')
+            with path.open(encoding='latin-1') as handle:
+                self.assertEqual('\xe9', handle.read())
+            with path.open('a', encoding='latin-1') as handle:
+                handle.write('t\xe9')
+
+        mock_open.assert_called_with('/path/to/latin', 'ab')
+        self.assertEqual(b'\xe9t\xe9', mock_open['/path/to/latin'].read_data)
+        self.assertTrue(mock_open['/path/to/latin'].closed)
+
+    def test_whole_files(self):
+        """Read and write whole files."""
+        import pathlib
+        mock_open = MockOpen.from_mapping({'/path/to/input': b'\x00\x01'})
+
+        with patch_pathlib(mock_open):
+            path = pathlib.Path('/path/to/input')
+            self.assertEqual(b'\x00\x01', path.read_bytes())
+            self.assertEqual(4, pathlib.Path('/path/to/output').write_text(u'été\n'))
+            self.assertEqual(u'été\n', pathlib.Path('/path/to/output').read_text())
+            self.assertEqual(
+                u'\xc3\xa9t\xc3\xa9\n', pathlib.Path('/path/to/output').read_text('latin-1'))
+            self.assertEqual(3, path.write_bytes(bytearray(b'abc')))
+            self.assertEqual('abc', path.read_text())
+            pathlib.Path('/path/to/latin').write_text(u'é', encoding='latin-1')
+
+        self.assertEqual(b'abc', mock_open['/path/to/input'].read_data)
+        self.assertEqual(b'\xe9', mock_open['/path/to/latin'].read_data)
+        self.assertEqual(['input', 'latin', 'output'], mock_open.listdir('/path/to'))
+        # The whole-file helpers don't go through open().
+        self.assertFalse(mock_open.called)
+
+        stats = mock_open.stats('/path/to/input')
+        self.assertEqual((3, 3, 2, 1), (stats.opens, stats.closes, stats.reads, stats.writes))
+
+    def test_side_effects(self):
+        """Files with side effects are opened as usual."""
+        import pathlib
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].side_effect = IOError()
+
+        with patch_pathlib(mock_open):
+            with self.assertRaises(IOError):
+                pathlib.Path('/path/to/file').read_bytes()
+            with self.assertRaises(IOError):
+                pathlib.Path('/path/to/file').write_text('Some text')
+
+    def test_unknown_paths(self):
+        """Reading unknown files gets the default contents, like opening them."""
+        import pathlib
+        mock_open = MockOpen(read_data='Default')
+
+        with patch_pathlib(mock_open):
+            self.assertEqual('Default', pathlib.Path('/path/to/file').read_text())
+
+        mock_open.assert_called_once_with('/path/to/file', 'r')
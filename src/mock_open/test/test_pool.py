@@ -0,0 +1,60 @@
+"""Test cases for the pool module."""
+
+import gc
+import unittest
+from mock_open.mocks import MockOpen
+from mock_open.pool import ContentPool
+
+
+class TestContentPool(unittest.TestCase):
+    """Test sharing identical contents."""
+    def test_share(self):
+        """Identical data is shared, text is encoded."""
+        pool = ContentPool()
+        shared = pool.share(u'café')
+        self.assertEqual(b'caf\xc3\xa9', shared.data)
+        self.assertIs(shared, pool.share(u'caf' + u'é'))
+        binary = pool.share(b'caf\xc3\xa9')
+        self.assertIsNot(shared, binary)
+        self.assertEqual(2, len(pool))
+
+    def test_released(self):
+        """Contents are dropped once they're not shared anymore."""
+        pool = ContentPool()
+        shared = pool.share(b'data')
+        self.assertEqual(1, len(pool))
+        del shared
+        gc.collect()
+        self.assertEqual(0, len(pool))
+
+
+class TestSharedFiles(unittest.TestCase):
+    """Test files sharing their contents through a MockOpen's pool."""
+    def test_default_contents(self):
+        """Files created with the default contents share them until written."""
+        mock_open = MockOpen(read_data='template\n')
+        files = [mock_open['/path/to/file_%d' % (i, )] for i in range(100)]
+        pool = files[0].pool
+        self.assertTrue(all(child.pool is pool for child in files))
+        self.assertEqual(1, len(pool))
+
+        files[0].write('TEMPLATE')
+        self.assertEqual('TEMPLATE\n', files[0].read_data)
+        self.assertEqual('template\n', files[1].read_data)
+
+        for child in files[1:]:
+            child.write('written')
+        gc.collect()
+        self.assertEqual(0, len(pool))
+
+    def test_written_contents(self):
+        """Files written with identical contents share them as well."""
+        mock_open = MockOpen()
+        for i in range(10):
+            mock_open.write_file('/path/to/file_%d' % (i, ), b'\0' * 1024)
+        self.assertEqual(b'\0' * 1024, mock_open.read_file('/path/to/file_9', binary=True))
+        self.assertEqual(1, len(mock_open['/path/to/file_0'].pool))
+
+
+if __name__ == '__main__':
+    unittest.main()
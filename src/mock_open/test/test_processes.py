@@ -0,0 +1,133 @@
+"""Test cases for the processes module."""
+
+import multiprocessing
+import os
+import pickle
+import unittest
+from mock_open.mocks import MockOpen
+from mock_open.processes import init_worker, merged, Task
+
+from unittest.mock import Mock
+
+
+def _process_file(path):
+    """Uppercase a file's first line into a new file, removing the original."""
+    with open(path, 'r') as handle:
+        line = handle.readline()
+    with open(path + '.upper', 'w') as handle:
+        handle.write(line.upper())
+    os.remove(path)
+    return len(line)
+
+
+def _pickled(value):
+    # pylint: disable=missing-docstring
+    return pickle.loads(pickle.dumps(value))
+
+
+class TestExport(unittest.TestCase):
+    """Test copying a MockOpen's files into another one."""
+    def test_export(self):
+        """Files are copied along with the mock's settings."""
+        mock_open = MockOpen.from_mapping(
+            {'/lazy': b'lazy'}, read_data='default', case_sensitive=False)
+        mock_open.write_file('/Text', 'text')
+
+        copy = _pickled(mock_open.export()).create()
+        self.assertEqual('text', copy.read_file('/text'))
+        self.assertEqual(b'lazy', copy.read_file('/LAZY', binary=True))
+        self.assertEqual('default', copy.read_file('/other'))
+
+    def test_load_lazy_files(self):
+        """Lazy files may be loaded when exporting them."""
+        load = Mock(return_value='lazy')
+        mock_open = MockOpen()
+        mock_open.add_lazy_file('/lazy', load)
+        exported = mock_open.export(lazy=False)
+        load.assert_called_once_with()
+        self.assertEqual({'/lazy': 'lazy'}, exported.files)
+
+
+class TestWriteBack(unittest.TestCase):
+    """Test merging the changes made to a copy of the files."""
+    def setUp(self):
+        self.mock_open = MockOpen()
+        self.mock_open.write_file('/data/binary', b'0123456789')
+        self.mock_open.write_file('/data/removed', 'removed')
+        self.exported = _pickled(self.mock_open.export())
+
+    def test_merge(self):
+        """Written ranges, created and removed files are merged back."""
+        copy = self.exported.create()
+        snapshot = copy.snapshot()
+        with copy('/data/binary', 'r+b') as handle:
+            handle.seek(2)
+            handle.write(b'ab')
+            handle.truncate(8)
+        copy.write_file('/data/created', 'created')
+        copy.remove('/data/removed')
+        self.mock_open.merge(_pickled(copy.write_back(snapshot)))
+
+        self.assertEqual(b'01ab4567', self.mock_open.read_file('/data/binary', binary=True))
+        self.assertEqual('created', self.mock_open.read_file('/data/created'))
+        self.assertFalse(self.mock_open.exists('/data/removed'))
+
+    def test_merge_ranges(self):
+        """Changes to different ranges of a file are all kept."""
+        for (offset, data) in ((1, b'A'), (8, b'B')):
+            copy = self.exported.create()
+            snapshot = copy.snapshot()
+            with copy('/data/binary', 'r+b') as handle:
+                handle.seek(offset)
+                handle.write(data)
+            self.mock_open.merge(copy.write_back(snapshot))
+        self.assertEqual(b'0A234567B9', self.mock_open.read_file('/data/binary', binary=True))
+
+    def test_merge_stats(self):
+        """The I/O done is added to the files' statistics, once."""
+        copy = self.exported.create()
+        snapshot = copy.snapshot()
+        with copy('/data/binary', 'rb') as handle:
+            handle.read(4)
+            handle.read()
+        write_back = copy.write_back(snapshot)
+        self.mock_open.merge(write_back)
+        self.mock_open.merge(copy.write_back(snapshot))
+
+        stats = self.mock_open.stats('/data/binary')
+        self.assertEqual((2, 2, 10), (stats.opens, stats.reads, stats.bytes_read))
+        self.assertEqual(3, self.mock_open.stats_total().opens)
+
+
+class TestProcessPool(unittest.TestCase):
+    """Test running tasks in a pool of worker processes."""
+    def test_pool(self):
+        """Workers use the exported files, their changes are merged back."""
+        mock_open = MockOpen()
+        paths = ['/data/file_%d' % (i, ) for i in range(8)]
+        for path in paths:
+            mock_open.write_file(path, 'line of %s\nsecond line\n' % (path, ))
+
+        if hasattr(multiprocessing, 'get_context'):
+            context = multiprocessing.get_context()
+        else:
+            context = multiprocessing
+        pool = context.Pool(2, initializer=init_worker, initargs=(mock_open.export(), ))
+        try:
+            results = list(merged(mock_open, pool.map(Task(_process_file), paths)))
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEqual([len('line of %s\n' % (path, )) for path in paths], results)
+        self.assertEqual(['file_%d.upper' % (i, ) for i in range(8)], mock_open.listdir('/data'))
+        self.assertEqual(8, mock_open.stats_total().reads)
+        self.assertEqual('LINE OF /DATA/FILE_3\n', mock_open.read_file('/data/file_3.upper'))
+
+    def test_not_initialized(self):
+        """Tasks can't run outside of workers."""
+        self.assertRaises(RuntimeError, Task(_process_file), '/data/file')
+
+
+if __name__ == '__main__':
+    unittest.main()
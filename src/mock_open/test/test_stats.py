@@ -0,0 +1,140 @@
+"""Test cases for the stats module."""
+
+import unittest
+from mock_open.mocks import MockOpen
+
+from unittest.mock import patch, Mock
+
+OPEN = 'builtins.open'
+
+
+class TestFileStats(unittest.TestCase):
+    """Test accounting for the I/O done on fake files."""
+    def test_counters(self):
+        """Count calls and the amount of data read and written."""
+        mock_open = MockOpen(read_data='line 1\nline 2\n')
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/input', 'r') as source:
+                lines = list(source)
+                source.seek(0)
+                data = source.read(4)
+            with open('/path/to/output', 'wb') as destination:
+                destination.write(b'0123')
+                destination.writelines([b'45', b'6'])
+
+        self.assertEqual(['line 1\n', 'line 2\n'], lines)
+        self.assertEqual('line', data)
+
+        stats = mock_open.stats('/path/to/input')
+        self.assertEqual((1, 1), (stats.opens, stats.closes))
+        # Iterating reads each line and then the end of the file.
+        self.assertEqual((4, 18), (stats.reads, stats.bytes_read))
+        self.assertEqual((0, 0), (stats.writes, stats.bytes_written))
+        self.assertEqual(1, stats.seeks)
+
+        stats = mock_open.stats('/path/to/output')
+        self.assertEqual((0, 0), (stats.reads, stats.bytes_read))
+        self.assertEqual((2, 7), (stats.writes, stats.bytes_written))
+
+        total = mock_open.stats_total()
+        self.assertEqual((2, 2), (total.opens, total.closes))
+        self.assertEqual((4, 18), (total.reads, total.bytes_read))
+        self.assertEqual((2, 7), (total.writes, total.bytes_written))
+        self.assertEqual(1, total.seeks)
+
+    def test_peak_open(self):
+        """Track the most handles open at once."""
+        mock_open = MockOpen()
+
+        with patch(OPEN, mock_open):
+            first = open('/path/to/first', 'r')
+            with open('/path/to/second', 'r'):
+                with open('/path/to/third', 'r'):
+                    pass
+            first.close()
+            first.close()
+            open('/path/to/fourth', 'r')
+
+        total = mock_open.stats_total()
+        self.assertEqual(3, total.peak_open)
+        self.assertEqual((4, 3, 1), (total.opens, total.closes, total.open_handles))
+        self.assertEqual([mock_open['/path/to/fourth']], total.handles())
+        self.assertEqual(1, mock_open.stats('/path/to/first').peak_open)
+
+    def test_independent_handles(self):
+        """Each independent handle counts separately."""
+        mock_open = MockOpen(read_data='Some data', independent_handles=True)
+
+        with patch(OPEN, mock_open):
+            first = open('/path/to/file', 'r')
+            with open('/path/to/file', 'r') as second:
+                second.read()
+                second.close()
+            first.read(4)
+
+        stats = mock_open.stats('/path/to/file')
+        self.assertEqual(2, stats.peak_open)
+        self.assertEqual((2, 1), (stats.opens, stats.closes))
+        self.assertEqual([first], stats.handles())
+        self.assertEqual((2, 13), (stats.reads, stats.bytes_read))
+
+    def test_unknown_paths(self):
+        """Looking up stats doesn't create files, nor load lazy ones."""
+        mock_open = MockOpen()
+        load = Mock(return_value='lazy')
+        mock_open.add_lazy_file('/path/to/lazy', load)
+
+        self.assertRaises(KeyError, mock_open.stats, '/path/to/nope')
+        self.assertFalse(mock_open.exists('/path/to/nope'))
+        self.assertEqual(['lazy'], mock_open.listdir('/path/to'))
+        self.assertEqual(0, mock_open.stats('/path/to/lazy').opens)
+        load.assert_not_called()
+
+    def test_reset(self):
+        """Resetting file mocks resets their counters."""
+        mock_open = MockOpen(read_data='Some data')
+
+        with patch(OPEN, mock_open):
+            open('/path/to/file', 'r').read()
+        mock_open['/path/to/file'].reset_mock()
+        self.assertEqual(0, mock_open.stats('/path/to/file').reads)
+
+        mock_open.reset_mock()
+        self.assertEqual(0, mock_open.stats_total().reads)
+
+    def test_reset_reused_files(self):
+        """Files reused after resetting the mock still count in the total."""
+        mock_open = MockOpen(read_data='Some data')
+        mock_open('/path/to/file').close()
+        mock_open.reset_mock()
+        self.assertEqual([], mock_open.leaks())
+
+        mock_open('/path/to/file').close()
+        self.assertEqual(1, mock_open.stats('/path/to/file').opens)
+        self.assertEqual(1, mock_open.stats_total().opens)
+
+    def test_text_bytes(self):
+        """Text is counted by the bytes of its utf8 encoding."""
+        mock_open = MockOpen(read_data='caf\xe9\n')
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual('caf\xe9\n', handle.read())
+            with open('/path/to/output', 'w') as handle:
+                handle.write('\u20ac')
+
+        self.assertEqual(6, mock_open.stats('/path/to/file').bytes_read)
+        self.assertEqual(3, mock_open.stats('/path/to/output').bytes_written)
+
+    def test_add(self):
+        """Counters are added to a file's stats and the total, peaks aren't."""
+        mock_open = MockOpen(read_data='Some data')
+        with patch(OPEN, mock_open):
+            open('/path/to/file', 'r').read()
+
+        counters = mock_open.stats('/path/to/file').counters()
+        self.assertEqual(9, counters['bytes_read'])
+        mock_open.stats('/path/to/file').add(counters)
+        stats = mock_open.stats('/path/to/file')
+        self.assertEqual((2, 2, 18, 1), (stats.opens, stats.reads, stats.bytes_read, stats.peak_open))
+        self.assertEqual(2, mock_open.stats_total().opens)
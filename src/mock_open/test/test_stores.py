@@ -0,0 +1,264 @@
+"""Test cases for the stores module."""
+
+import os
+import tempfile
+import unittest
+from functools import partial
+from io import UnsupportedOperation
+from os import SEEK_END
+from mock_open.mocks import MockOpen
+from mock_open.stores import StreamingStore, MappedStore, ChunkedStore
+
+from unittest.mock import Mock, patch
+
+OPEN = 'builtins.open'
+
+
+def _generate_lines(count):
+    # pylint: disable=missing-docstring
+    for i in range(count):
+        yield 'line %d\n' % (i, )
+
+
+class TestStreamingStore(unittest.TestCase):
+    """Test contents pulled from an iterable or a callable on demand."""
+    def test_read_from_generator(self):
+        """Read lines generated on the fly."""
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = _generate_lines(1000)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual('line 0\n', handle.readline())
+                self.assertEqual('line 1\nli', handle.read(9))
+                self.assertEqual(['ne 2\n', 'line 3\n'], [next(handle), next(handle)])
+                lines = list(handle)
+
+        self.assertEqual(996, len(lines))
+        self.assertEqual('line 999\n', lines[-1])
+
+    def test_read_from_callable(self):
+        """Read from a callable returning the bytes at a given offset."""
+        requests = []
+        def read_zeros(offset, size):
+            # pylint: disable=missing-docstring
+            requests.append((offset, size))
+            return b'\0' * max(0, min(size, 10 ** 9 - offset))
+
+        mock_open = MockOpen(read_data=read_zeros)
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'rb') as handle:
+                handle.seek(10 ** 9 - 3)
+                self.assertEqual(b'\0\0\0', handle.read())
+                self.assertEqual(10 ** 9, handle.tell())
+
+        # Only the chunk holding the file's tail was ever requested.
+        self.assertEqual(1, len(requests))
+
+    def test_seek_end(self):
+        """Seeking relative to the end pulls the source to find its size."""
+        store = StreamingStore([b'abc', b'', b'def'], chunk_size=2)
+        self.assertEqual(6, store.seek(0, SEEK_END))
+        self.assertEqual(b'', store.read())
+        store.seek(2)
+        self.assertEqual(b'cde', store.read(3))
+
+    def test_rewind_iterable(self):
+        """Re-iterable sources are restarted when seeking backwards."""
+        mock_open = MockOpen(read_data=[b'first\n', b'second\n'])
+        with patch(OPEN, mock_open):
+            for _ in range(2):
+                with open('/path/to/file', 'rb') as handle:
+                    self.assertEqual([b'first\n', b'second\n'], handle.readlines())
+
+    def test_rewind_one_shot(self):
+        """One-shot sources can't go backwards."""
+        store = StreamingStore(iter([b'first\n', b'second\n']))
+        self.assertEqual(b'first\n', store.readline())
+        self.assertEqual(b'second\n', store.readline())
+        store.seek(0)
+        self.assertRaises(UnsupportedOperation, store.read)
+
+    def test_default_sources(self):
+        """Every file streams from the default source, which must be re-iterable."""
+        mock_open = MockOpen(read_data=[b'first\n', b'second\n'])
+        first_handle = mock_open('/path/to/first', 'rb')
+        second_handle = mock_open('/path/to/second', 'rb')
+        self.assertEqual(b'first\n', first_handle.readline())
+        self.assertEqual(b'first\n', second_handle.readline())
+        self.assertEqual(b'second\n', first_handle.readline())
+
+        self.assertRaises(ValueError, MockOpen, read_data=_generate_lines(3))
+        self.assertRaises(ValueError, MockOpen, read_data=iter([b'chunk']))
+
+    def test_read_only(self):
+        """Streaming contents can't be written to."""
+        store = StreamingStore([b'data'])
+        self.assertRaises(UnsupportedOperation, store.write, b'more')
+
+    def test_read_data(self):
+        """`read_data` materializes the whole contents."""
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = _generate_lines(3)
+        self.assertEqual(b'line 0\nline 1\nline 2\n', mock_open['/path/to/file'].read_data)
+
+    def test_invalid_source(self):
+        """Sources must be iterable or callable."""
+        self.assertRaises(TypeError, StreamingStore, 17)
+
+
+class TestMappedStore(unittest.TestCase):
+    """Test contents backed by a memory-mapped real file."""
+    CONTENTS = b'first line\nsecond line\nthird line\n'
+
+    def setUp(self):
+        (descriptor, self.path) = tempfile.mkstemp()
+        os.write(descriptor, self.CONTENTS)
+        os.close(descriptor)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _real_contents(self):
+        # pylint: disable=missing-docstring
+        with open(self.path, 'rb') as real_file:
+            return real_file.read()
+
+    def test_read(self):
+        """Read a mapped file as text and as binary."""
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = MappedStore(self.path)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual('first line\n', handle.readline())
+                self.assertEqual(['second line\n', 'third line\n'], list(handle))
+
+            with open('/path/to/file', 'rb') as handle:
+                handle.seek(-5, SEEK_END)
+                self.assertEqual(b'line\n', handle.read())
+
+    def test_read_buffer(self):
+        """The file's contents are accessible without copying them."""
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = MappedStore(self.path)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'rb') as handle:
+                view = handle.read_buffer
+                self.assertTrue(view.readonly)
+                self.assertEqual(self.CONTENTS, view.tobytes())
+                view.release()
+
+    def test_copy_on_write(self):
+        """Writes never reach the real file."""
+        mock_open = MockOpen()
+        mock_open['/path/to/file'].read_data = MappedStore(self.path)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r+b') as handle:
+                handle.write(b'FIRST')
+                handle.seek(0, SEEK_END)
+                handle.write(b'fourth line\n')
+
+            with open('/path/to/file', 'rb') as handle:
+                self.assertEqual(
+                    b'FIRST line\nsecond line\nthird line\nfourth line\n', handle.read())
+
+        self.assertEqual(self.CONTENTS, self._real_contents())
+
+    def test_truncate(self):
+        """Truncating and writing past the end zero-fills the gap."""
+        store = MappedStore(self.path)
+        store.truncate(5)
+        store.seek(8)
+        store.write(b'!')
+        self.assertEqual(b'first\0\0\0!', store.getvalue())
+        store.truncate(20)
+        self.assertEqual(b'first\0\0\0!' + b'\0' * 11, store.getvalue())
+
+    def test_write_across_end(self):
+        """Writes straddling the real file's end keep the overlay after them."""
+        store = MappedStore(self.path)
+        size = len(self.CONTENTS)
+        store.seek(size)
+        store.write(b'XYZW')
+        store.seek(size - 1)
+        store.write(b'QR')
+        self.assertEqual(self.CONTENTS[:-1] + b'QRYZW', store.getvalue())
+        self.assertEqual(size + 4, store.seek(0, SEEK_END))
+
+    def test_read_only(self):
+        """Read-only mappings can't be written to."""
+        store = MappedStore(self.path, writable=False)
+        self.assertRaises(UnsupportedOperation, store.write, b'data')
+        self.assertEqual(self.CONTENTS, store.read())
+
+    def test_empty_file(self):
+        """Empty files can't be memory-mapped, but may still be written to."""
+        with open(self.path, 'wb'):
+            pass
+
+        store = MappedStore(self.path)
+        self.assertEqual(b'', store.read())
+        store.write(b'data\n')
+        store.seek(0)
+        self.assertEqual(b'data\n', store.readline())
+
+
+class TestChunkedStore(unittest.TestCase):
+    """Test contents kept as a list of fixed-size chunks."""
+    def test_read_and_write(self):
+        """Reads and writes spanning several chunks."""
+        store = ChunkedStore(b'first line\nsecond line\n', chunk_size=4)
+        self.assertEqual(b'first line\n', store.readline())
+        self.assertEqual(b'sec', store.readline(3))
+        store.seek(3)
+        self.assertEqual(6, store.write(b'ST LIN'))
+        store.seek(0, SEEK_END)
+        store.write(bytearray(b'third line\n'))
+        store.seek(0)
+        self.assertEqual(
+            [b'firST LINe\n', b'second line\n', b'third line\n'], store.readlines())
+        self.assertEqual(b'', store.read())
+        self.assertEqual(34, store.size())
+
+    def test_truncate(self):
+        """Truncating and writing past the end zero-fills the gap."""
+        store = ChunkedStore(b'first line\n', chunk_size=4)
+        store.truncate(5)
+        store.seek(8)
+        store.write(b'!')
+        self.assertEqual(b'first\0\0\0!', store.getvalue())
+        store.truncate(12)
+        self.assertEqual(b'first\0\0\0!\0\0\0', store.getvalue())
+        store.truncate(4)
+        self.assertEqual(b'firs', store.getvalue())
+
+    def test_copy(self):
+        """Copies are independent, sharing chunks until they're written."""
+        store = ChunkedStore(b'0123456789', chunk_size=4)
+        store.write(b'ab')
+        copy = store.copy()
+        store.write(b'cd')
+        copy.seek(8)
+        copy.write(b'XY')
+        self.assertEqual(b'abcd456789', store.getvalue())
+        self.assertEqual(b'ab234567XY', copy.getvalue())
+
+    def test_default_store(self):
+        """A MockOpen's files may all be kept in chunked stores."""
+        store = Mock(side_effect=partial(ChunkedStore, chunk_size=2))
+        mock_open = MockOpen(read_data='default\n', store=store)
+        self.assertIs(store, mock_open['/path/to/file'].store)
+        store.assert_called_once_with(b'default\n')
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'a') as handle:
+                handle.seek(0, SEEK_END)
+                handle.write('appended\n')
+            with open('/path/to/file', 'r+') as handle:
+                handle.write('DEF')
+            with open('/path/to/file', 'r') as handle:
+                self.assertEqual(['DEFault\n', 'appended\n'], list(handle))
+        self.assertEqual('DEFault\nappended\n', mock_open['/path/to/file'].read_data)
@@ -0,0 +1,75 @@
+"""Test cases for the tracing module."""
+
+import unittest
+from mock_open.mocks import MockOpen
+from mock_open.costs import CostModel, VirtualClock
+from mock_open.tracing import AccessTrace, Access
+
+from unittest.mock import patch
+
+OPEN = 'builtins.open'
+
+
+class TestAccessTrace(unittest.TestCase):
+    """Test tracing the ranges read from and written to fake files."""
+    def test_trace(self):
+        """Log reads and writes as byte ranges, timed by the clock."""
+        clock = VirtualClock()
+        mock_open = MockOpen(read_data=u'été\n', cost_model=CostModel(latency=1, clock=clock))
+        mock_open['/path/to/file'].trace = AccessTrace(clock=clock)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                handle.read(2)
+                handle.seek(0)
+            with open('/path/to/file', 'a') as handle:
+                handle.write('x')
+
+        self.assertEqual([
+            Access('read', 0, 3, 0.0),
+            Access('write', 6, 1, 2.0),
+        ], list(mock_open['/path/to/file'].trace))
+
+    def test_statistics(self):
+        """Report read amplification, sequential accesses and small reads."""
+        mock_open = MockOpen(read_data=b'x' * 10000, trace=True)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'rb') as handle:
+                handle.read(1000)
+                handle.read(1)
+                handle.read(3)
+                handle.seek(0)
+                handle.read(5000)
+                handle.seek(9000)
+                handle.read()
+
+        trace = mock_open['/path/to/file'].trace
+        self.assertEqual(5, len(trace))
+        self.assertEqual((1004 + 5000 + 1000) / 6000.0, trace.read_amplification())
+        self.assertEqual(3 / 5.0, trace.sequential_ratio())
+        self.assertEqual({1: 1, 4: 1, 1024: 2}, trace.small_reads(threshold=4096))
+        self.assertEqual(1.0, trace.sequential_ratio('write'))
+
+        trace.clear()
+        self.assertEqual(0, len(trace))
+        self.assertEqual(0.0, trace.read_amplification())
+
+    def test_iteration(self):
+        """Iterating over lines is traced, including reaching the end of file."""
+        mock_open = MockOpen(read_data='line 1\nline 2\n', trace=True)
+
+        with patch(OPEN, mock_open):
+            with open('/path/to/file', 'r') as handle:
+                for _ in handle:
+                    pass
+
+        trace = mock_open['/path/to/file'].trace
+        self.assertEqual([(0, 7), (7, 7), (14, 0)], trace.accesses('read'))
+        self.assertEqual(1.0, trace.read_amplification())
+        self.assertEqual(1.0, trace.sequential_ratio())
+
+    def test_disabled(self):
+        """Tracing is off by default."""
+        mock_open = MockOpen()
+        self.assertIsNone(mock_open['/path/to/file'].trace)
@@ -0,0 +1,117 @@
+"""Tracing the access patterns of fake files."""
+
+from array import array
+from collections import namedtuple
+from timeit import default_timer
+
+try:
+    array('q')
+    _OFFSET_TYPE = 'q'
+except ValueError:
+    _OFFSET_TYPE = 'l'
+
+# The kinds of accesses, as stored in the trace.
+_KINDS = ('read', 'write')
+
+Access = namedtuple('Access', 'kind offset length timestamp')
+
+
+class AccessTrace(object):
+    """A log of the byte ranges read from and written to a file.
+
+    Accesses are kept in compact arrays rather than as `call` objects, so
+    tracing millions of them is cheap. Offsets and lengths are measured in
+    bytes of the file's contents, even when it's opened as text. Timestamps
+    are taken from `clock` (any callable returning the current time, e.g. a
+    `costs.VirtualClock`).
+    """
+    def __init__(self, clock=default_timer):
+        self.clock = clock
+        self.__kinds = array('b')
+        self.__offsets = array(_OFFSET_TYPE)
+        self.__lengths = array(_OFFSET_TYPE)
+        self.__timestamps = array('d')
+
+    def record(self, kind, offset, length):
+        """Log a 'read' or 'write' access to a range of bytes."""
+        self.__kinds.append(_KINDS.index(kind))
+        self.__offsets.append(offset)
+        self.__lengths.append(length)
+        self.__timestamps.append(self.clock())
+
+    def clear(self):
+        """Forget the accesses logged so far."""
+        for log in (self.__kinds, self.__offsets, self.__lengths, self.__timestamps):
+            del log[:]
+
+    def __len__(self):
+        return len(self.__kinds)
+
+    def __iter__(self):
+        for i in range(len(self.__kinds)):
+            yield Access(
+                _KINDS[self.__kinds[i]], self.__offsets[i], self.__lengths[i],
+                self.__timestamps[i])
+
+    def accesses(self, kind='read'):
+        """The (offset, length) pairs of one kind of access, in order."""
+        code = _KINDS.index(kind)
+        return [
+            (self.__offsets[i], self.__lengths[i])
+            for i in range(len(self.__kinds)) if self.__kinds[i] == code
+        ]
+
+    def read_amplification(self):
+        """The ratio of the bytes read to the distinct bytes read.
+
+        1.0 means every byte was read once. Empty reads are ignored, and 0.0
+        is returned when nothing was read.
+        """
+        ranges = sorted(
+            (offset, offset + length) for (offset, length) in self.accesses('read') if length)
+        total = sum(end - start for (start, end) in ranges)
+        if not total:
+            return 0.0
+
+        distinct = 0
+        (current_start, current_end) = ranges[0]
+        for (start, end) in ranges[1:]:
+            if current_end < start:
+                distinct += current_end - current_start
+                (current_start, current_end) = (start, end)
+            else:
+                current_end = max(current_end, end)
+        distinct += current_end - current_start
+        return float(total) / distinct
+
+    def sequential_ratio(self, kind='read'):
+        """The fraction of accesses continuing where the previous one ended.
+
+        The first access is sequential if it starts at the beginning of the
+        file. 1.0 is returned when there weren't any accesses.
+        """
+        accesses = self.accesses(kind)
+        if not accesses:
+            return 1.0
+
+        sequential = 0
+        previous_end = 0
+        for (offset, length) in accesses:
+            if offset == previous_end:
+                sequential += 1
+            previous_end = offset + length
+        return float(sequential) / len(accesses)
+
+    def small_reads(self, threshold=4096):
+        """A histogram of the reads smaller than `threshold` bytes.
+
+        Maps power-of-two sizes to the number of reads up to that size (and
+        larger than the previous power of two). Empty reads map to 0.
+        """
+        histogram = {}
+        for (_, length) in self.accesses('read'):
+            if threshold <= length:
+                continue
+            bucket = 1 << (length - 1).bit_length() if length else 0
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        return histogram